@@ -1,10 +1,14 @@
 # This is a placeholder for AI model integration
+import re
+
+_GARBAGE = re.compile(r"\bgarbage\b", re.IGNORECASE)
+_ROAD = re.compile(r"\broads?\b", re.IGNORECASE)
 
 def categorize_complaint(text):
     # Replace with real AI inference later
-    if "garbage" in text.lower():
+    if _GARBAGE.search(text):
         return "Sanitation", "High"
-    elif "road" in text.lower():
+    elif _ROAD.search(text):
         return "Infrastructure", "Medium"
     else:
         return "General", "Low"
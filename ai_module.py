@@ -1,6 +1,8 @@
 # ai_module.py
 
 import re
+import json
+import threading
 from collections import Counter
 
 # Categories and corresponding keywords
@@ -8,7 +10,7 @@ CATEGORIES = {
     "road": ["road", "pothole", "street", "highway", "sidewalk", "speedbreaker", "traffic"],
     "electricity": ["electricity", "power", "light", "transformer", "outage", "voltage", "cable"],
     "water": ["water", "pipeline", "drain", "sewage", "tap", "leak", "flood"],
-    "garbage": ["garbage", "waste", "trash", "cleanliness", "bin", "dump", "rubbish"],
+    "garbage": ["garbage", "waste", "trash", "cleanliness", "bin", "dustbin", "dump", "rubbish"],
     "other": []  # catch-all
 }
 
@@ -21,34 +23,87 @@ RECOMMENDED_SCHEMES = {
     "other": "General Civic Improvement Scheme"
 }
 
+_NON_ALNUM = re.compile(r'[^a-zA-Z0-9\s]')
+
+
+def _compile_matcher(categories):
+    """
+    Builds one alternation regex over every keyword, matched at the start of a word
+    (so "light" no longer matches inside "flight"); inflections such as "leaking",
+    "drainage" or "streetlights" still count for the keyword they start with.
+    Returns (pattern, keyword -> category, category order for tie-breaking).
+    """
+    keyword_category = {}
+    for category, keywords in categories.items():
+        for keyword in keywords:
+            keyword_category.setdefault(keyword.lower(), category)
+    if not keyword_category:
+        return None, {}, list(categories)
+    alternation = "|".join(re.escape(k) for k in sorted(keyword_category, key=len, reverse=True))
+    pattern = re.compile(rf"\b({alternation})\w*")
+    return pattern, keyword_category, list(categories)
+
+
+_matcher = _compile_matcher(CATEGORIES)
+_reload_lock = threading.Lock()
+
+
+def set_categories(categories: dict, schemes: dict = None):
+    """
+    Hot-swaps the category table (and optionally the scheme table) used by the classifier.
+    New tables are built first and each module-level reference is replaced in one assignment,
+    so concurrent classify/analyze calls never see a half-built or empty table.
+    """
+    global _matcher, CATEGORIES, RECOMMENDED_SCHEMES
+    matcher = _compile_matcher(categories)
+    with _reload_lock:
+        CATEGORIES = dict(categories)
+        if schemes is not None:
+            RECOMMENDED_SCHEMES = dict(schemes)
+        _matcher = matcher
+
+
+def reload_categories(path: str):
+    """
+    Reloads categories from a JSON file: {"categories": {...}, "recommended_schemes": {...}}.
+    """
+    with open(path, "r") as f:
+        table = json.load(f)
+    set_categories(table["categories"], table.get("recommended_schemes"))
+
+
 def clean_text(text: str) -> str:
     """
     Basic text cleaning: lowercase, strip, remove special characters
     """
     text = text.lower().strip()
-    text = re.sub(r'[^a-zA-Z0-9\s]', '', text)
+    text = _NON_ALNUM.sub('', text)
     return text
 
 def classify_complaint(text: str) -> str:
     """
     Classify complaint into a category based on keyword frequency.
     Returns the category with the most matches; defaults to 'other'.
+    Ties go to the category listed first in CATEGORIES.
     """
-    text = clean_text(text)
-    category_counts = Counter()
+    pattern, keyword_category, order = _matcher
+    if pattern is None:
+        return "other"
 
-    for category, keywords in CATEGORIES.items():
-        for keyword in keywords:
-            # Count how many times each keyword appears
-            occurrences = text.count(keyword)
-            if occurrences > 0:
-                category_counts[category] += occurrences
-
-    if category_counts:
-        # Return the category with the highest count
-        return category_counts.most_common(1)[0][0]
-    else:
+    category_counts = Counter(keyword_category[m] for m in pattern.findall(clean_text(text)))
+    if not category_counts:
         return "other"
+    best = max(category_counts.values())
+    return next(c for c in order if category_counts.get(c) == best)
+
+def classify_batch(texts):
+    """
+    Classifies a list of texts or a pandas Series (returned as a Series with the same index).
+    """
+    categories = [classify_complaint(text) for text in texts]
+    if hasattr(texts, "index") and hasattr(texts, "to_numpy"):
+        return type(texts)(categories, index=texts.index, name="category")
+    return categories
 
 def analyze_complaint(text: str) -> dict:
     """
@@ -61,6 +116,21 @@ def analyze_complaint(text: str) -> dict:
         "recommended_scheme": scheme
     }
 
+def analyze_batch(texts):
+    """
+    Batch version of analyze_complaint. Returns a list of dicts, or a DataFrame
+    (category, recommended_scheme) when given a pandas Series.
+    """
+    categories = classify_batch(texts)
+    if isinstance(categories, list):
+        return [
+            {"category": c, "recommended_scheme": RECOMMENDED_SCHEMES.get(c, "General Civic Improvement Scheme")}
+            for c in categories
+        ]
+    return categories.to_frame().assign(
+        recommended_scheme=categories.map(RECOMMENDED_SCHEMES).fillna("General Civic Improvement Scheme")
+    )
+
 # Example usage
 if __name__ == "__main__":
     sample_text = "There is a huge pothole on the street and the water pipeline nearby is leaking."
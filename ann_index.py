@@ -0,0 +1,340 @@
+# ann_index.py
+#
+# Pluggable nearest-neighbour indexes for complaint-group merging.
+# All indexes share one interface (build / add / remove / search) so
+# RealtimeDBSCANProcessor can swap exact search for an approximate one.
+
+import math
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:  # optional: only needed for HNSWIndex
+    hnswlib = None
+
+
+# --- 1. ExactIndex ---
+# Brute-force L2 search over a contiguous float32 matrix. Also the vector store the
+# approximate indexes build on.
+class ExactIndex:
+    def __init__(self):
+        self.dim = None
+        self._vectors = None
+        self._keys = []
+        self._row_of = {}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, key):
+        return key in self._row_of
+
+    def build(self, keys, vectors):
+        """
+        Replaces the index contents with the given keys and (n, dim) vectors.
+        """
+        self._keys = list(keys)
+        self._row_of = {key: row for row, key in enumerate(self._keys)}
+        self._size = len(self._keys)
+        if self._size:
+            self._vectors = np.array(vectors, dtype=np.float32, order='C', ndmin=2)
+            self.dim = self._vectors.shape[1]
+        else:
+            self._vectors = None
+        self._on_build()
+
+    def add(self, key, vector):
+        """
+        Inserts a vector, or replaces it if the key already exists. Amortized O(1) for the matrix.
+        """
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if key in self._row_of:
+            row = self._row_of[key]
+            self._vectors[row] = vector
+            self._on_update(key, row)
+            return
+
+        if self._vectors is None:
+            self.dim = vector.shape[0]
+            self._vectors = np.empty((1, self.dim), dtype=np.float32)
+        if self._size == self._vectors.shape[0]:
+            self._grow(max(1, self._size) * 2)
+
+        row = self._size
+        self._vectors[row] = vector
+        self._keys.append(key)
+        self._row_of[key] = row
+        self._size += 1
+        self._on_add(key, row)
+
+    def remove(self, key):
+        """
+        Removes a key, moving the last row into its slot to keep the matrix contiguous.
+        """
+        row = self._row_of.pop(key, None)
+        if row is None:
+            return
+        last = self._size - 1
+        if row != last:
+            last_key = self._keys[last]
+            self._vectors[row] = self._vectors[last]
+            self._keys[row] = last_key
+            self._row_of[last_key] = row
+            self._on_move(last, row)
+        self._keys.pop()
+        self._size -= 1
+        self._on_remove(key)
+
+    def vector(self, key):
+        return self._vectors[self._row_of[key]]
+
+    def search(self, query, k=1, candidates=None):
+        """
+        Returns up to k (key, distance) pairs, nearest first.
+        `candidates` optionally restricts the search to a subset of keys (e.g. a spatial prefilter).
+        """
+        if self._size == 0:
+            return []
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+
+        rows = None
+        if candidates is not None:
+            rows = np.fromiter((self._row_of[key] for key in candidates if key in self._row_of), dtype=np.int64)
+            if rows.size == 0:
+                return []
+        rows = self._select_rows(query, rows)
+        if rows is not None and rows.size == 0:
+            return []
+
+        vectors = self._vectors[:self._size] if rows is None else self._vectors[rows]
+        distances = np.linalg.norm(vectors - query, axis=1)
+        return self._top_k(distances, rows, k)
+
+    def _top_k(self, distances, rows, k):
+        k = min(k, distances.size)
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        found_rows = top if rows is None else rows[top]
+        return [(self._keys[row], float(distances[i])) for row, i in zip(found_rows.tolist(), top.tolist())]
+
+    # Hooks for subclasses
+    def _grow(self, capacity):
+        grown = np.empty((capacity, self.dim), dtype=np.float32)
+        grown[:self._size] = self._vectors[:self._size]
+        self._vectors = grown
+
+    def _select_rows(self, query, rows):
+        return rows
+
+    def _on_build(self):
+        pass
+
+    def _on_add(self, key, row):
+        pass
+
+    def _on_update(self, key, row):
+        pass
+
+    def _on_move(self, src, dst):
+        pass
+
+    def _on_remove(self, key):
+        pass
+
+
+# --- 2. IVFIndex ---
+# Inverted-file index in pure NumPy: a k-means coarse quantizer splits the vectors into
+# `nlist` cells and a query only scores the `nprobe` closest cells.
+class IVFIndex(ExactIndex):
+    def __init__(self, nlist=256, nprobe=8, train_iters=10, train_sample_per_list=64, seed=0):
+        super().__init__()
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_iters = train_iters
+        self.train_sample_per_list = train_sample_per_list
+        self.seed = seed
+        self.centroids = None
+        self._assign = np.empty(0, dtype=np.int32)
+
+    @staticmethod
+    def _nearest_centroid(vectors, centroids, chunk_size=16384):
+        centroid_sq = (centroids ** 2).sum(axis=1)
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            scores = centroid_sq - 2.0 * (chunk @ centroids.T)
+            labels[start:start + chunk_size] = np.argmin(scores, axis=1)
+        return labels
+
+    def train(self, vectors):
+        """
+        Fits the coarse quantizer with a few Lloyd iterations on a sample of the vectors.
+        """
+        rng = np.random.default_rng(self.seed)
+        nlist = min(self.nlist, len(vectors))
+        sample_size = min(len(vectors), nlist * self.train_sample_per_list)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(self.train_iters):
+            labels = self._nearest_centroid(sample, centroids)
+            counts = np.bincount(labels, minlength=nlist)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+        self.centroids = centroids
+
+    def _on_build(self):
+        self._assign = np.empty(self._size, dtype=np.int32)
+        if self._size < self.nlist:
+            # Too few vectors to be worth quantizing; search stays exact until the next build.
+            self.centroids = None
+            return
+        self.train(self._vectors[:self._size])
+        self._assign[:self._size] = self._nearest_centroid(self._vectors[:self._size], self.centroids)
+
+    def _grow(self, capacity):
+        super()._grow(capacity)
+        grown = np.empty(capacity, dtype=np.int32)
+        grown[:self._size] = self._assign[:self._size]
+        self._assign = grown
+
+    def _on_add(self, key, row):
+        if self._assign.shape[0] < self._vectors.shape[0]:
+            grown = np.empty(self._vectors.shape[0], dtype=np.int32)
+            grown[:row] = self._assign[:row]
+            self._assign = grown
+        self._on_update(key, row)
+
+    def _on_update(self, key, row):
+        if self.centroids is not None:
+            self._assign[row] = self._nearest_centroid(self._vectors[row:row + 1], self.centroids)[0]
+
+    def _on_move(self, src, dst):
+        self._assign[dst] = self._assign[src]
+
+    def _select_rows(self, query, rows):
+        if self.centroids is None:
+            return rows
+        centroid_distances = ((self.centroids - query) ** 2).sum(axis=1)
+        nprobe = min(self.nprobe, len(self.centroids))
+        probed = np.argpartition(centroid_distances, nprobe - 1)[:nprobe]
+        if rows is None:
+            return np.flatnonzero(np.isin(self._assign[:self._size], probed))
+        return rows[np.isin(self._assign[rows], probed)]
+
+
+# --- 3. HNSWIndex ---
+# Graph-based search through the optional `hnswlib` package. Vectors are also kept in the
+# exact store, so prefiltered (candidate) searches are scored exactly.
+class HNSWIndex(ExactIndex):
+    def __init__(self, M=16, ef_construction=200, ef_search=64):
+        if hnswlib is None:
+            raise ImportError("HNSWIndex requires the optional 'hnswlib' package (pip install hnswlib)")
+        super().__init__()
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._graph = None
+        self._label_of = {}
+        self._key_of_label = {}
+        self._next_label = 0
+
+    def _new_graph(self, capacity):
+        graph = hnswlib.Index(space='l2', dim=self.dim)
+        graph.init_index(max_elements=max(capacity, 1024), ef_construction=self.ef_construction, M=self.M)
+        graph.set_ef(self.ef_search)
+        return graph
+
+    def _on_build(self):
+        self._label_of = {key: label for label, key in enumerate(self._keys)}
+        self._key_of_label = dict(enumerate(self._keys))
+        self._next_label = self._size
+        self._graph = None
+        if self._size:
+            self._graph = self._new_graph(self._size * 2)
+            self._graph.add_items(self._vectors[:self._size], np.arange(self._size))
+
+    def _on_add(self, key, row):
+        if self._graph is None:
+            self._graph = self._new_graph(1024)
+        if self._graph.get_current_count() >= self._graph.get_max_elements():
+            self._graph.resize_index(self._graph.get_max_elements() * 2)
+        label = self._next_label
+        self._next_label += 1
+        self._label_of[key] = label
+        self._key_of_label[label] = key
+        self._graph.add_items(self._vectors[row:row + 1], np.array([label]))
+
+    def _on_update(self, key, row):
+        self._graph.mark_deleted(self._label_of.pop(key))
+        self._on_add(key, row)
+
+    def _on_remove(self, key):
+        label = self._label_of.pop(key)
+        del self._key_of_label[label]
+        self._graph.mark_deleted(label)
+
+    def search(self, query, k=1, candidates=None):
+        if candidates is not None or self._size == 0:
+            return super().search(query, k, candidates)
+        query = np.asarray(query, dtype=np.float32).reshape(1, -1)
+        labels, sq_distances = self._graph.knn_query(query, k=min(k, self._size))
+        return [(self._key_of_label[int(label)], math.sqrt(max(float(d), 0.0)))
+                for label, d in zip(labels[0], sq_distances[0])]
+
+
+# --- 4. SpatialPrefilter ---
+# Grid hash over group centers. A query returns the keys in the 3x3 block of cells around
+# a point, which covers at least `radius_meters` in every direction.
+class SpatialPrefilter:
+    def __init__(self, radius_meters=1000):
+        self.radius_meters = radius_meters
+        self._lat_step = radius_meters / 111111
+        self._cells = {}
+        self._cell_of = {}
+
+    def _lon_step(self, lat_cell):
+        # Longitude cells are sized at the band's center latitude so every point in a band shares one scale.
+        band_lat = (lat_cell + 0.5) * self._lat_step
+        return self.radius_meters / (111111 * max(math.cos(math.radians(band_lat)), 1e-6))
+
+    def _cell(self, lat, lon):
+        lat_cell = math.floor(lat / self._lat_step)
+        return lat_cell, math.floor(lon / self._lon_step(lat_cell))
+
+    def __len__(self):
+        return len(self._cell_of)
+
+    def clear(self):
+        self._cells = {}
+        self._cell_of = {}
+
+    def add(self, key, lat, lon):
+        self.remove(key)
+        cell = self._cell(lat, lon)
+        self._cells.setdefault(cell, set()).add(key)
+        self._cell_of[key] = cell
+
+    def remove(self, key):
+        cell = self._cell_of.pop(key, None)
+        if cell is None:
+            return
+        members = self._cells[cell]
+        members.discard(key)
+        if not members:
+            del self._cells[cell]
+
+    def candidates(self, lat, lon):
+        lat_cell = math.floor(lat / self._lat_step)
+        found = []
+        for band in (lat_cell - 1, lat_cell, lat_cell + 1):
+            lon_cell = math.floor(lon / self._lon_step(band))
+            for cell in ((band, lon_cell - 1), (band, lon_cell), (band, lon_cell + 1)):
+                members = self._cells.get(cell)
+                if members:
+                    found.extend(members)
+        return found
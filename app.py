@@ -1,17 +1,32 @@
+import time
+APP_IMPORT_STARTED = time.perf_counter()
+
 import os
+import io
+import threading
+import csv
+import zlib
+import base64
 import random
 import pickle
 import json
-import pandas as pd
+import math
+import itertools
 from datetime import datetime, timedelta
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.utils import secure_filename
+from sqlalchemy import event, insert
 from flask_cors import CORS     # ✅ Added CORS
-from twilio.rest import Client   # for SMS OTP
-import pyttsx3
-import speech_recognition as sr
-from red_zone_processor import RedZoneDetector# ✅ integrate your Red Zone processor
+from red_zone_processor import RedZoneDetector, RedZoneSnapshot# ✅ integrate your Red Zone processor
+from media_store import MediaStore, MediaPostProcessor, make_photo_thumbnail, make_video_poster, send_media
+from tts_service import TTSService
+from dedup import NearDuplicateIndex
+from spatial_index import GridSpatialIndex
+from otp_store import OtpStore, OtpLocked, OtpIssueLimited
+from sms_queue import OutboundSMSQueue, TwilioTransport, FileTransport, InMemoryTransport
+from priority_index import ALL as ALL_CATEGORIES
+from model_registry import registry as model_registry  # heavy ML models load lazily on first use
+# twilio, pyttsx3 and speech_recognition are imported where they are used to keep worker startup fast.
    
 # ================================
 # Flask & DB Setup
@@ -20,8 +35,16 @@ app = Flask(__name__)
 CORS(app)  # ✅ Enable CORS for all domains
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(BASE_DIR, 'instance', 'hackathon.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
+    "DATABASE_URL", 'sqlite:///' + os.path.join(BASE_DIR, 'instance', 'hackathon.db'))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Pooled connections; `timeout` is SQLite's busy timeout so writers wait instead of failing under WAL.
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    "pool_size": 10,
+    "max_overflow": 20,
+    "pool_pre_ping": True,
+    "connect_args": {"timeout": 30, "check_same_thread": False},
+}
 
 UPLOAD_FOLDER_PHOTOS = os.path.join(BASE_DIR, 'uploads', 'photos')
 UPLOAD_FOLDER_VIDEOS = os.path.join(BASE_DIR, 'uploads', 'videos')
@@ -30,37 +53,77 @@ os.makedirs(UPLOAD_FOLDER_PHOTOS, exist_ok=True)
 os.makedirs(UPLOAD_FOLDER_VIDEOS, exist_ok=True)
 os.makedirs(UPLOAD_FOLDER_AUDIO, exist_ok=True)
 
+# Photos/videos are stored content-addressed (<sha256><ext>); derived media is built in the background
+photo_store = MediaStore(UPLOAD_FOLDER_PHOTOS)
+video_store = MediaStore(UPLOAD_FOLDER_VIDEOS)
+media_processor = MediaPostProcessor(max_workers=int(os.getenv("MEDIA_WORKERS", "2")))
+
 db = SQLAlchemy(app)
 
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")      # readers don't block the writer
+    cursor.execute("PRAGMA synchronous=NORMAL")    # durable at checkpoints; safe with WAL
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-20000")     # ~20 MB page cache per connection
+    cursor.close()
+
+
+with app.app_context():
+    if db.engine.dialect.name == "sqlite":
+        event.listen(db.engine, "connect", _configure_sqlite)
+
 # ================================
-# Twilio Setup
+# SMS Setup
 # ================================
 TWILIO_SID = os.getenv("TWILIO_SID", "")
 TWILIO_AUTH = os.getenv("TWILIO_AUTH", "")
 TWILIO_PHONE = os.getenv("TWILIO_PHONE", "")
+# SMS_TRANSPORT: "twilio" (default when credentials are set), "file" (JSON lines in SMS_OUTBOX_PATH) or "memory"
+SMS_TRANSPORT = os.getenv("SMS_TRANSPORT", "twilio" if TWILIO_SID and TWILIO_AUTH and TWILIO_PHONE else "")
+
+
+def build_sms_transport():
+    if SMS_TRANSPORT == "twilio":
+        return TwilioTransport(TWILIO_SID, TWILIO_AUTH, TWILIO_PHONE)
+    if SMS_TRANSPORT == "file":
+        return FileTransport(os.getenv("SMS_OUTBOX_PATH", os.path.join(BASE_DIR, "sms_outbox.jsonl")))
+    if SMS_TRANSPORT == "memory":
+        return InMemoryTransport()
+    return None
+
+
+sms_transport = build_sms_transport()
+sms_queue = None
+if sms_transport is not None:
+    sms_queue = OutboundSMSQueue(
+        sms_transport,
+        workers=int(os.getenv("SMS_WORKERS", "2")),
+        rate_limit=int(os.getenv("SMS_RATE_LIMIT", "3")),
+        rate_window_seconds=int(os.getenv("SMS_RATE_WINDOW", "600"))
+    )
+
+
+class SMSRateLimited(Exception):
+    pass
 
-twilio_client = None
-if TWILIO_SID and TWILIO_AUTH and TWILIO_PHONE:
-    try:
-        twilio_client = Client(TWILIO_SID, TWILIO_AUTH)
-    except Exception as e:
-        print("⚠️ Twilio init failed:", e)
+
+def reserve_otp_sms(phone):
+    """Takes the phone's SMS rate-limit slot for the next send_otp_via_sms; raises SMSRateLimited."""
+    if sms_queue and not sms_queue.reserve(f"+91{phone}"):
+        raise SMSRateLimited(phone)
 
 
 def send_otp_via_sms(phone, otp):
-    if not twilio_client:
-        print("⚠️ Twilio not configured, returning OTP directly.")
-        return None
-    try:
-        message = twilio_client.messages.create(
-            body=f"Your OTP is {otp}. It is valid for 5 minutes.",
-            from_=TWILIO_PHONE,
-            to=f"+91{phone}"
-        )
-        return message.sid
-    except Exception as e:
-        print("⚠️ SMS sending failed:", e)
+    """
+    Queues the OTP SMS (its slot was taken by reserve_otp_sms) and returns its queue id;
+    None when no SMS transport is configured.
+    """
+    if not sms_queue:
+        print("⚠️ SMS not configured, returning OTP directly.")
         return None
+    return sms_queue.enqueue(f"+91{phone}", f"Your OTP is {otp}. It is valid for 5 minutes.", reserved=True)
 
 
 # ================================
@@ -70,10 +133,24 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     phone = db.Column(db.String(15), unique=True, nullable=False)
-    otp = db.Column(db.String(6), nullable=True)
+    otp = db.Column(db.String(6), nullable=True)          # legacy; OTPs live in the otp_code table
     otp_expiry = db.Column(db.DateTime, nullable=True)
 
 
+class OtpCode(db.Model):
+    __tablename__ = "otp_code"
+
+    id = db.Column(db.Integer, primary_key=True)
+    phone = db.Column(db.String(15), unique=True, nullable=False)
+    code = db.Column(db.String(10), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    issue_count = db.Column(db.Integer, default=0, nullable=False)
+    issue_window_start = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
 class Complaint(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -88,15 +165,28 @@ class Complaint(db.Model):
     status = db.Column(db.String(20), default="Pending")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Composite indexes backing keyset pagination on (created_at, id) and its filters
+    __table_args__ = (
+        db.Index('ix_complaint_created_id', 'created_at', 'id'),
+        db.Index('ix_complaint_status_created_id', 'status', 'created_at', 'id'),
+        db.Index('ix_complaint_category_created_id', 'category', 'created_at', 'id'),
+        db.Index('ix_complaint_priority_created_id', 'priority', 'created_at', 'id'),
+        db.Index('ix_complaint_lat_lon', 'gps_lat', 'gps_lon'),
+    )
+
 
 with app.app_context():
     db.create_all()
+    # create_all() skips tables that already exist, so add any missing indexes explicitly
+    for index in Complaint.__table__.indexes:
+        index.create(bind=db.engine, checkfirst=True)
 
 
 # ================================
 # Voice Utilities
 # ================================
 def record_voice_to_text():
+    import speech_recognition as sr
     recognizer = sr.Recognizer()
     mic = sr.Microphone()
     with mic as source:
@@ -115,30 +205,177 @@ def record_voice_to_text():
         return None
 
 
-def text_to_speech_file(message, filename):
-    engine = pyttsx3.init()
-    filepath = os.path.join(UPLOAD_FOLDER_AUDIO, filename)
-    engine.save_to_file(message, filepath)
-    engine.runAndWait()
-    return filepath
+tts_service = TTSService(
+    UPLOAD_FOLDER_AUDIO,
+    max_cache_bytes=int(os.getenv("TTS_CACHE_MB", "200")) * 1024 * 1024,
+    max_cache_files=int(os.getenv("TTS_CACHE_FILES", "2000"))
+)
 
 
 # ================================
 # Red Zone Setup
 # ================================
-RED_ZONE_DATA_PATH = os.path.join(BASE_DIR, "red_zone_map_data.json")
+RED_ZONE_DATA_PATH = os.getenv("RED_ZONE_DATA_PATH", os.path.join(BASE_DIR, "red_zone_map_data.json"))
+RED_ZONE_PERSIST_DELAY = float(os.getenv("RED_ZONE_PERSIST_DELAY", "5"))
 red_zone_detector = RedZoneDetector()
+# The grid is fed only from the Complaint table: each worker counts ids above the highest one it
+# has seen (a primary-key range scan, usually empty) after its own inserts, before serving
+# /red_zones and before writing the map file, so every worker serves and persists the full map.
+red_zone_sync = {"last_id": 0}
+
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def epoch_seconds(dt):
+    return (dt - EPOCH).total_seconds()
+
 
-if os.path.exists(RED_ZONE_DATA_PATH):
-    with open(RED_ZONE_DATA_PATH, "r") as f:
-        red_zone_data = json.load(f)
-else:
-    red_zone_data = {"zones": []}
+def sync_red_zones(rebuild=False):
+    """
+    Counts complaints committed (by any worker) since the last sync into the red-zone grid.
+    rebuild=True re-reads the whole table in a single streamed pass instead.
+    """
+    with red_zone_snapshot.lock:
+        last_id = 0 if rebuild else red_zone_sync["last_id"]
+        rows = db.session.query(Complaint.id, Complaint.gps_lat, Complaint.gps_lon, Complaint.created_at) \
+            .filter(Complaint.id > last_id).order_by(Complaint.id).yield_per(1000)
+        seen = {"last_id": last_id}
+
+        def coords():
+            for complaint_id, lat, lon, created_at in rows:
+                seen["last_id"] = complaint_id
+                yield lat, lon, epoch_seconds(created_at) if created_at else None
+
+        if rebuild:
+            red_zone_detector.rebuild(coords())
+        else:
+            new_rows = list(coords())
+            if new_rows:
+                red_zone_detector.add_complaints(new_rows)
+        red_zone_sync["last_id"] = seen["last_id"]
+
+
+def _sync_red_zones_before_flush():
+    with app.app_context():
+        sync_red_zones()
+
+
+red_zone_snapshot = RedZoneSnapshot(red_zone_detector, RED_ZONE_DATA_PATH, persist_delay=RED_ZONE_PERSIST_DELAY,
+                                    before_flush=_sync_red_zones_before_flush)
+
+
+def rebuild_red_zones():
+    """Rebuild the red-zone grid and its 24h/7d/30d activity rings from every stored complaint in a single pass."""
+    sync_red_zones(rebuild=True)
+    red_zone_snapshot.flush()
+
+
+with app.app_context():
+    rebuild_red_zones()
+
+
+# ================================
+# Near-duplicate collapsing
+# ================================
+# Repeats of a recent complaint from the same grid cell bump Complaint.count instead of adding a row.
+duplicate_index = NearDuplicateIndex(
+    threshold=float(os.getenv("DUPLICATE_THRESHOLD", "0.7")),
+    window_seconds=int(os.getenv("DUPLICATE_WINDOW_HOURS", "24")) * 3600
+)
+duplicate_lock = threading.Lock()
+# Tags bulk chunks' provisional ("pending", tag, row) keys, so one chunk never matches another's rows
+_pending_tags = itertools.count()
+# Highest Complaint.id this worker has read into duplicate_index; complaints other workers commit
+# after it are picked up by sync_duplicate_index() before each duplicate check.
+duplicate_sync = {"last_id": 0}
+
+
+def _index_duplicate_rows(rows):
+    for c in rows:
+        if c.id not in duplicate_index and c.gps_lat is not None and c.gps_lon is not None:
+            duplicate_index.add(c.id, c.text, c.gps_lat, c.gps_lon, epoch_seconds(c.created_at))
+        duplicate_sync["last_id"] = max(duplicate_sync["last_id"], c.id)
+
+
+def rebuild_duplicate_index():
+    last_id = db.session.query(db.func.max(Complaint.id)).scalar() or 0
+    since = datetime.utcnow() - timedelta(seconds=duplicate_index.window_seconds)
+    rows = db.session.query(Complaint.id, Complaint.text, Complaint.gps_lat, Complaint.gps_lon, Complaint.created_at) \
+        .filter(Complaint.created_at >= since, Complaint.gps_lat.isnot(None), Complaint.gps_lon.isnot(None)) \
+        .order_by(Complaint.created_at).yield_per(1000)
+    with duplicate_lock:
+        _index_duplicate_rows(rows)
+        duplicate_sync["last_id"] = max(duplicate_sync["last_id"], last_id)
+
+
+def sync_duplicate_index():
+    """Indexes complaints committed (by any worker) since the last sync. Call with duplicate_lock held."""
+    rows = db.session.query(Complaint.id, Complaint.text, Complaint.gps_lat, Complaint.gps_lon, Complaint.created_at) \
+        .filter(Complaint.id > duplicate_sync["last_id"]).order_by(Complaint.id).all()
+    _index_duplicate_rows(rows)
+
+
+with app.app_context():
+    rebuild_duplicate_index()
+
+
+# ================================
+# Complaint location index
+# ================================
+# Grid hash over every complaint's GPS point behind /complaints/near and /complaints/bbox.
+# The table is the only feed: each worker catches up on ids above the highest one it has indexed
+# (a primary-key range scan, usually empty) after its own inserts and before every query, so
+# complaints created through other workers are found too. Ids are assigned in commit order on SQLite.
+complaint_locations = GridSpatialIndex(cell_meters=float(os.getenv("SPATIAL_CELL_METERS", "250")))
+complaint_locations_lock = threading.Lock()
+
+
+def sync_complaint_locations():
+    """Indexes complaints inserted (by any worker) since the last sync; the first call loads the table."""
+    last_id = complaint_locations.max_key or 0
+    rows = db.session.query(Complaint.id, Complaint.gps_lat, Complaint.gps_lon) \
+        .filter(Complaint.id > last_id, Complaint.gps_lat.isnot(None), Complaint.gps_lon.isnot(None)) \
+        .yield_per(10000)
+    ids, lats, lons = [], [], []
+    for complaint_id, lat, lon in rows:
+        ids.append(complaint_id)
+        lats.append(lat)
+        lons.append(lon)
+    if not ids:
+        return
+    with complaint_locations_lock:
+        # Another thread may have synced meanwhile; only add what it did not
+        if (complaint_locations.max_key or 0) > last_id:
+            fresh = [i for i, complaint_id in enumerate(ids) if complaint_id > complaint_locations.max_key]
+            ids, lats, lons = [ids[i] for i in fresh], [lats[i] for i in fresh], [lons[i] for i in fresh]
+        complaint_locations.add_batch(ids, lats, lons)
+
+
+with app.app_context():
+    sync_complaint_locations()
 
 
 # ================================
 # OTP APIs
 # ================================
+otp_store = OtpStore(
+    db, OtpCode,
+    ttl_seconds=300,
+    max_attempts=int(os.getenv("OTP_MAX_ATTEMPTS", "5")),
+    lockout_seconds=int(os.getenv("OTP_LOCKOUT_SECONDS", "900")),
+    max_issues=int(os.getenv("OTP_MAX_ISSUES", "5")),
+    issue_window_seconds=int(os.getenv("OTP_ISSUE_WINDOW_SECONDS", "900"))
+)
+
+OTP_FAILURE_MESSAGES = {
+    "missing": "No OTP requested for this number",
+    "expired": "OTP expired",
+    "locked": "Too many invalid attempts, try again later",
+    "invalid": "Invalid OTP",
+}
+
+
 @app.route('/register', methods=['POST'])
 def register():
     data = request.json
@@ -148,24 +385,34 @@ def register():
     if not phone or not name:
         return jsonify({"message": "Name and phone number required"}), 400
 
+    if otp_store.locked_until(phone):
+        return jsonify({"message": OTP_FAILURE_MESSAGES["locked"]}), 429
+
     user = User.query.filter_by(phone=phone).first()
     if not user:
         user = User(phone=phone, name=name)
         db.session.add(user)
+        db.session.commit()
 
     otp = str(random.randint(1000, 9999))
-    user.otp = otp
-    user.otp_expiry = datetime.utcnow() + timedelta(minutes=5)
-    db.session.commit()
+    # Rate-limit first, then store, then send: a refused request leaves the code the user already
+    # received in place, and no user is ever texted a code that was not saved
+    try:
+        reserve_otp_sms(phone)
+        expires_at = otp_store.issue(phone, otp)
+    except (SMSRateLimited, OtpIssueLimited):
+        return jsonify({"message": "Too many OTP requests, try again later"}), 429
+    except OtpLocked:
+        return jsonify({"message": OTP_FAILURE_MESSAGES["locked"]}), 429
 
     sms_id = send_otp_via_sms(phone, otp)
 
     return jsonify({
-        "message": "OTP sent to your mobile number" if sms_id else "OTP generated (Twilio not configured)",
+        "message": "OTP sent to your mobile number" if sms_id else "OTP generated (SMS not configured)",
         "phone": phone,
         "name": user.name,
         "otp": "sent_via_sms" if sms_id else otp,
-        "expires_at": user.otp_expiry.isoformat()
+        "expires_at": expires_at.isoformat()
     })
 
 
@@ -178,14 +425,10 @@ def login():
     user = User.query.filter_by(phone=phone).first()
     if not user:
         return jsonify({"message": "User not found"}), 404
-    if user.otp != otp:
-        return jsonify({"message": "Invalid OTP"}), 401
-    if datetime.utcnow() > user.otp_expiry:
-        return jsonify({"message": "OTP expired"}), 401
 
-    user.otp = None
-    user.otp_expiry = None
-    db.session.commit()
+    ok, reason = otp_store.verify(phone, otp)
+    if not ok:
+        return jsonify({"message": OTP_FAILURE_MESSAGES[reason]}), 429 if reason == "locked" else 401
 
     return jsonify({
         "message": "Login successful",
@@ -198,34 +441,76 @@ def login():
 # ================================
 # Complaint APIs
 # ================================
+def compute_priority(text, category):
+    if "fire" in text.lower() or (category or "").lower() == "fire":
+        return "High"
+    return "Low"
+
+
 @app.route('/complaints', methods=['POST'])
 def add_complaint():
     data = request.form
     user_id = data.get("user_id")
     text = data.get("text", "")
     category = data.get("category", "")
-    gps_lat = float(data.get("gps_lat", 0))
-    gps_lon = float(data.get("gps_lon", 0))
+    try:
+        gps_lat, gps_lon = parse_gps(data.get("gps_lat", 0), data.get("gps_lon", 0))
+    except ValueError:
+        return jsonify({"message": "Invalid gps_lat/gps_lon"}), 400
 
     user = User.query.filter_by(id=user_id).first()
     if not user:
         return jsonify({"message": "User not found"}), 404
 
+    # Media is saved first, so a report that turns out to be a duplicate doesn't lose it
     photo_file = request.files.get("photo")
     video_file = request.files.get("video")
 
     photo_filename = None
     video_filename = None
+    new_photo = new_video = False
     if photo_file:
-        photo_filename = secure_filename(photo_file.filename)
-        photo_file.save(os.path.join(UPLOAD_FOLDER_PHOTOS, photo_filename))
+        photo_filename, new_photo = photo_store.save(photo_file)
     if video_file:
-        video_filename = secure_filename(video_file.filename)
-        video_file.save(os.path.join(UPLOAD_FOLDER_VIDEOS, video_filename))
-
-    priority = "Low"
-    if "fire" in text.lower() or category.lower() == "fire":
-        priority = "High"
+        video_filename, new_video = video_store.save(video_file)
+    if new_photo:
+        media_processor.submit(make_photo_thumbnail, photo_store.path(photo_filename))
+    if new_video:
+        media_processor.submit(make_video_poster, video_store.path(video_filename))
+
+    now = datetime.utcnow()
+    with duplicate_lock:
+        sync_duplicate_index()
+        duplicate_id, similarity = duplicate_index.find(text, gps_lat, gps_lon, epoch_seconds(now))
+    if isinstance(duplicate_id, tuple):
+        duplicate_id = None  # provisional key of an uncommitted bulk row
+    if duplicate_id is not None:
+        # The duplicate's media fills the matched complaint's empty photo/video slots
+        values = {Complaint.count: Complaint.count + 1}
+        if photo_filename:
+            values[Complaint.photo] = db.func.coalesce(Complaint.photo, photo_filename)
+        if video_filename:
+            values[Complaint.video] = db.func.coalesce(Complaint.video, video_filename)
+        updated = Complaint.query.filter_by(id=duplicate_id).update(values, synchronize_session=False)
+        db.session.commit()
+        if updated:
+            existing = db.session.query(Complaint.count, Complaint.photo, Complaint.video) \
+                .filter_by(id=duplicate_id).first()
+            return jsonify({
+                "message": "Matches a recent complaint; duplicate count increased",
+                "complaint_id": duplicate_id,
+                "duplicate": True,
+                "similarity": round(similarity, 3),
+                "count": existing.count,
+                "photo": existing.photo,
+                "video": existing.video,
+                # False when the matched complaint already had its own photo/video
+                "media_attached": photo_filename in (None, existing.photo) and video_filename in (None, existing.video)
+            })
+        with duplicate_lock:
+            duplicate_index.remove(duplicate_id)  # matched complaint was deleted
+
+    priority = compute_priority(text, category)
 
     new_complaint = Complaint(
         user_id=user.id,
@@ -235,44 +520,439 @@ def add_complaint():
         gps_lon=gps_lon,
         photo=photo_filename,
         video=video_filename,
-        priority=priority
+        priority=priority,
+        created_at=now
     )
     db.session.add(new_complaint)
     db.session.commit()
 
-    df_new = pd.DataFrame([{"latitude": gps_lat, "longitude": gps_lon}])
-    red_zone_detector.assign_complaints_to_grids(df_new)
-    updated_map = red_zone_detector.get_map_data()
+    with duplicate_lock:
+        duplicate_index.add(new_complaint.id, text, gps_lat, gps_lon, epoch_seconds(now))
+    sync_complaint_locations()
 
-    with open(RED_ZONE_DATA_PATH, "w") as f:
-        json.dump(updated_map, f, indent=4)
+    sync_red_zones()
+    with red_zone_snapshot.lock:
+        grid_id = red_zone_detector._get_grid_id(gps_lat, gps_lon)
+        updated_zone = red_zone_detector.get_zone(grid_id)
+        red_zone_version = red_zone_detector.version
+    red_zone_snapshot.changed()
 
     return jsonify({
         "message": "Complaint added successfully",
         "complaint_id": new_complaint.id,
         "priority": new_complaint.priority,
-        "red_zone_update": updated_map
+        "duplicate": False,
+        "red_zone_update": updated_zone,
+        "red_zone_version": red_zone_version
+    })
+
+
+COMPLAINTS_PAGE_DEFAULT = 50
+COMPLAINTS_PAGE_MAX = 500
+
+# Column-only projection for complaint listings (no ORM object hydration)
+COMPLAINT_LIST_COLUMNS = (
+    Complaint.id, Complaint.text, Complaint.category, Complaint.gps_lat, Complaint.gps_lon,
+    Complaint.photo, Complaint.video, Complaint.priority, Complaint.count, Complaint.status,
+    Complaint.created_at
+)
+
+
+def complaint_row_to_dict(c):
+    return {
+        "id": c.id,
+        "text": c.text,
+        "category": c.category,
+        "gps": [c.gps_lat, c.gps_lon],
+        "photo": f"/uploads/photos/{c.photo}" if c.photo else None,
+        "video": f"/uploads/videos/{c.video}" if c.video else None,
+        "priority": c.priority,
+        "count": c.count,
+        "status": c.status,
+        "created_at": c.created_at.isoformat()
+    }
+
+
+def encode_complaint_cursor(created_at, complaint_id):
+    raw = f"{created_at.isoformat()}|{complaint_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_complaint_cursor(cursor):
+    created_at, complaint_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    return datetime.fromisoformat(created_at), int(complaint_id)
+
+
+def parse_bbox(value):
+    """Parses "min_lat,min_lon,max_lat,max_lon" into four finite floats; ValueError otherwise."""
+    min_lat, min_lon, max_lat, max_lon = (float(v) for v in value.split(","))
+    if not all(math.isfinite(v) for v in (min_lat, min_lon, max_lat, max_lon)):
+        raise ValueError("bbox must be finite")
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def filtered_complaints_query(args):
+    """
+    Builds the projected, filtered complaint query shared by the listing endpoints,
+    newest first on (created_at, id). Raises ValueError on malformed filters.
+    """
+    query = db.session.query(*COMPLAINT_LIST_COLUMNS)
+    for field in ("status", "category", "priority"):
+        value = args.get(field)
+        if value:
+            query = query.filter(getattr(Complaint, field) == value)
+
+    bbox = args.get("bbox")
+    if bbox:
+        min_lat, min_lon, max_lat, max_lon = parse_bbox(bbox)
+        query = query.filter(
+            Complaint.gps_lat.between(min_lat, max_lat),
+            Complaint.gps_lon.between(min_lon, max_lon)
+        )
+    return query.order_by(Complaint.created_at.desc(), Complaint.id.desc())
+
+
+BULK_CHUNK_SIZE = 1000
+
+
+def parse_gps(lat, lon):
+    """(lat, lon) as floats; ValueError unless both are finite and within [-90, 90] / [-180, 180]."""
+    lat, lon = float(lat), float(lon)
+    if not (math.isfinite(lat) and math.isfinite(lon) and -90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("gps out of range")
+    return lat, lon
+
+
+def _iter_bulk_items():
+    """Yields complaint dicts from a JSON array body or a streamed NDJSON body."""
+    if request.mimetype == "application/x-ndjson":
+        for line in io.BufferedReader(request.stream, 1 << 16):
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    else:
+        items = request.get_json()
+        if not isinstance(items, list):
+            raise ValueError("Expected a JSON array of complaints")
+        yield from items
+
+
+def _prepare_chunk(items, offset, errors, now, pending):
+    """
+    Validates a chunk and splits it into rows to insert and count increments for duplicates.
+    Rows are added to duplicate_index under provisional keys, which are also appended to `pending`
+    (key i belongs to rows[i]) so the caller can rekey or remove them.
+    """
+    timestamp = epoch_seconds(now)
+    tag = next(_pending_tags)
+    sync_duplicate_index()
+    increments = {}
+    user_ids = {
+        item.get("user_id") for item in items
+        if isinstance(item, dict) and isinstance(item.get("user_id"), (int, str))
+    }
+    known_users = {
+        str(uid) for (uid,) in db.session.query(User.id).filter(User.id.in_(user_ids))
+    } if user_ids else set()
+
+    rows = []
+    for i, item in enumerate(items, start=offset):
+        if not isinstance(item, dict):
+            errors.append({"index": i, "message": "Expected an object"})
+            continue
+        if str(item.get("user_id")) not in known_users:
+            errors.append({"index": i, "message": "User not found"})
+            continue
+        text = item.get("text")
+        if not text:
+            errors.append({"index": i, "message": "text required"})
+            continue
+        if not isinstance(text, str):
+            errors.append({"index": i, "message": "text must be a string"})
+            continue
+        category = item.get("category") or ""
+        if not isinstance(category, str):
+            errors.append({"index": i, "message": "category must be a string"})
+            continue
+        try:
+            gps_lat, gps_lon = parse_gps(item.get("gps_lat", 0), item.get("gps_lon", 0))
+        except (TypeError, ValueError):
+            errors.append({"index": i, "message": "Invalid gps_lat/gps_lon"})
+            continue
+
+        # Near-duplicates of recent complaints (or of earlier rows in this chunk) only bump a count
+        duplicate_id, _ = duplicate_index.find(text, gps_lat, gps_lon, timestamp)
+        if isinstance(duplicate_id, tuple):
+            if duplicate_id[1] != tag:
+                duplicate_id = None  # left behind by another chunk; never a row of this one
+            else:
+                rows[duplicate_id[2]]["count"] += 1
+                continue
+        if duplicate_id is not None:
+            increments[duplicate_id] = increments.get(duplicate_id, 0) + 1
+            continue
+        pending.append(("pending", tag, len(rows)))
+        duplicate_index.add(pending[-1], text, gps_lat, gps_lon, timestamp)
+        rows.append({
+            "user_id": int(item["user_id"]),
+            "text": text,
+            "category": category,
+            "gps_lat": gps_lat,
+            "gps_lon": gps_lon,
+            "priority": compute_priority(text, category),
+            "count": 1,
+            "created_at": now,
+        })
+    return rows, increments
+
+
+def _ingest_chunk(items, offset, errors):
+    """
+    Validates, de-duplicates, inserts and red-zone-aggregates one chunk in a single transaction.
+    Returns (inserted, merged).
+    """
+    now = datetime.utcnow()
+    pending = []
+    rekeyed = 0
+    with duplicate_lock:
+        try:
+            rows, increments = _prepare_chunk(items, offset, errors, now, pending)
+            ids = []
+            if rows:
+                ids = db.session.execute(
+                    insert(Complaint).returning(Complaint.id, sort_by_parameter_order=True), rows
+                ).scalars().all()
+            if increments:
+                table = Complaint.__table__
+                db.session.execute(
+                    table.update().where(table.c.id == db.bindparam("dup_id"))
+                    .values(count=table.c.count + db.bindparam("n")),
+                    [{"dup_id": dup_id, "n": n} for dup_id, n in increments.items()]
+                )
+            db.session.commit()
+            for key, complaint_id in zip(pending, ids):
+                duplicate_index.rekey(key, complaint_id)
+                rekeyed += 1
+        finally:
+            # Whatever failed (validation, insert or commit), no provisional key outlives the chunk
+            for key in pending[rekeyed:]:
+                duplicate_index.remove(key)
+
+    if rows:
+        sync_complaint_locations()
+        sync_red_zones()
+    return len(rows), sum(increments.values()) + sum(r["count"] - 1 for r in rows)
+
+
+@app.route('/complaints/bulk', methods=['POST'])
+def bulk_add_complaints():
+    """
+    Bulk ingestion for backlogs and partner feeds. Accepts a JSON array, or NDJSON with
+    Content-Type: application/x-ndjson. Each item: user_id, text, category, gps_lat, gps_lon.
+    Valid rows are inserted in transactions of BULK_CHUNK_SIZE; near-duplicates are merged into
+    an existing complaint's count; invalid rows are reported.
+    """
+    inserted = merged = 0
+    errors = []
+    chunk = []
+    offset = 0
+    try:
+        for item in _iter_bulk_items():
+            chunk.append(item)
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                chunk_inserted, chunk_merged = _ingest_chunk(chunk, offset, errors)
+                inserted += chunk_inserted
+                merged += chunk_merged
+                offset += len(chunk)
+                chunk = []
+        chunk_inserted, chunk_merged = _ingest_chunk(chunk, offset, errors)
+        inserted += chunk_inserted
+        merged += chunk_merged
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"message": f"Malformed body: {e}", "inserted": inserted, "merged": merged,
+                        "errors": errors}), 400
+    finally:
+        if inserted:
+            red_zone_snapshot.changed()
+
+    return jsonify({
+        "message": "Bulk ingestion complete",
+        "inserted": inserted,
+        "merged": merged,
+        "rejected": len(errors),
+        "errors": errors[:100]
     })
 
 
 @app.route('/complaints', methods=['GET'])
 def list_complaints():
-    comps = Complaint.query.order_by(Complaint.created_at.desc()).all()
-    results = []
-    for c in comps:
-        results.append({
-            "id": c.id,
-            "text": c.text,
-            "category": c.category,
-            "gps": [c.gps_lat, c.gps_lon],
-            "photo": f"/uploads/photos/{c.photo}" if c.photo else None,
-            "video": f"/uploads/videos/{c.video}" if c.video else None,
-            "priority": c.priority,
-            "count": c.count,
-            "status": c.status,
-            "created_at": c.created_at.isoformat()
-        })
-    return jsonify(results)
+    """
+    Keyset-paginated complaint listing.
+    Query params: limit, cursor (from a previous next_cursor), status, category, priority,
+    bbox=min_lat,min_lon,max_lat,max_lon.
+    """
+    try:
+        limit = min(max(int(request.args.get("limit", COMPLAINTS_PAGE_DEFAULT)), 1), COMPLAINTS_PAGE_MAX)
+        query = filtered_complaints_query(request.args)
+        cursor = request.args.get("cursor")
+        if cursor:
+            cursor_created_at, cursor_id = decode_complaint_cursor(cursor)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        return jsonify({"message": "Invalid limit, cursor or bbox"}), 400
+
+    if cursor:
+        query = query.filter(db.or_(
+            Complaint.created_at < cursor_created_at,
+            db.and_(Complaint.created_at == cursor_created_at, Complaint.id < cursor_id)
+        ))
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_complaint_cursor(rows[-1].created_at, rows[-1].id)
+
+    return jsonify({
+        "complaints": [complaint_row_to_dict(c) for c in rows],
+        "next_cursor": next_cursor
+    })
+
+
+NEAR_RADIUS_DEFAULT = 300
+NEAR_RADIUS_MAX = 5000
+
+
+def complaints_by_ids(ids):
+    """Listing rows for the given ids, in the order given."""
+    if not ids:
+        return []
+    rows = {c.id: c for c in db.session.query(*COMPLAINT_LIST_COLUMNS).filter(Complaint.id.in_(ids))}
+    return [rows[i] for i in ids if i in rows]
+
+
+@app.route('/complaints/near', methods=['GET'])
+def complaints_near():
+    """
+    Complaints within `radius` meters (default 300, max 5000) of lat/lon, nearest first.
+    Served from the in-memory location index; only the matching rows are read from the database.
+    """
+    try:
+        lat = float(request.args["lat"])
+        lon = float(request.args["lon"])
+        radius = float(request.args.get("radius", NEAR_RADIUS_DEFAULT))
+        limit = min(max(int(request.args.get("limit", COMPLAINTS_PAGE_DEFAULT)), 1), COMPLAINTS_PAGE_MAX)
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180 and 0 < radius <= NEAR_RADIUS_MAX):
+            raise ValueError
+    except (KeyError, ValueError):
+        return jsonify({"message": f"lat, lon and radius (0-{NEAR_RADIUS_MAX} m) are required"}), 400
+
+    sync_complaint_locations()
+    with complaint_locations_lock:
+        hits = complaint_locations.near(lat, lon, radius, limit + 1)
+    truncated = len(hits) > limit
+    hits = hits[:limit]
+    distances = dict(hits)
+    complaints = []
+    for c in complaints_by_ids([complaint_id for complaint_id, _ in hits]):
+        item = complaint_row_to_dict(c)
+        item["distance_m"] = round(distances[c.id], 1)
+        complaints.append(item)
+    return jsonify({"complaints": complaints, "truncated": truncated})
+
+
+@app.route('/complaints/bbox', methods=['GET'])
+def complaints_in_bbox():
+    """
+    Complaints inside bbox=min_lat,min_lon,max_lat,max_lon (a map viewport), up to `limit`.
+    """
+    try:
+        min_lat, min_lon, max_lat, max_lon = parse_bbox(request.args["bbox"])
+        limit = min(max(int(request.args.get("limit", COMPLAINTS_PAGE_MAX)), 1), COMPLAINTS_PAGE_MAX)
+        parse_gps(min_lat, min_lon)
+        parse_gps(max_lat, max_lon)
+        if min_lat > max_lat or min_lon > max_lon:
+            raise ValueError
+    except (KeyError, ValueError):
+        return jsonify({"message": "bbox=min_lat,min_lon,max_lat,max_lon is required"}), 400
+
+    sync_complaint_locations()
+    with complaint_locations_lock:
+        ids = complaint_locations.within(min_lat, min_lon, max_lat, max_lon, limit + 1)
+    truncated = len(ids) > limit
+    return jsonify({
+        "complaints": [complaint_row_to_dict(c) for c in complaints_by_ids(ids[:limit])],
+        "truncated": truncated
+    })
+
+
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_CSV_FIELDS = ["id", "text", "category", "gps_lat", "gps_lon", "photo", "video",
+                     "priority", "count", "status", "created_at"]
+
+
+def _export_chunks(query, fmt):
+    """Yields encoded NDJSON/CSV text one chunk of EXPORT_CHUNK_SIZE rows at a time."""
+    rows = query.execution_options(stream_results=True, yield_per=EXPORT_CHUNK_SIZE)
+    buffer = io.StringIO()
+    writer = None
+    if fmt == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_CSV_FIELDS)
+
+    pending = 0
+    for c in rows:
+        if writer:
+            writer.writerow([c.id, c.text, c.category, c.gps_lat, c.gps_lon, c.photo, c.video,
+                             c.priority, c.count, c.status, c.created_at.isoformat()])
+        else:
+            buffer.write(json.dumps(complaint_row_to_dict(c), separators=(",", ":")))
+            buffer.write("\n")
+        pending += 1
+        if pending >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@app.route('/complaints/export', methods=['GET'])
+def export_complaints():
+    """
+    Streams every matching complaint as NDJSON (default) or CSV (?format=csv) from a
+    server-side cursor, gzip-compressed when the client accepts it. Memory use is bounded
+    by EXPORT_CHUNK_SIZE regardless of table size. Takes the same filters as GET /complaints.
+    """
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in ("ndjson", "csv"):
+        return jsonify({"message": "format must be ndjson or csv"}), 400
+    try:
+        query = filtered_complaints_query(request.args)
+    except (ValueError, TypeError):
+        return jsonify({"message": "Invalid bbox"}), 400
+
+    chunks = _export_chunks(query, fmt)
+    headers = {
+        "Content-Disposition": f"attachment; filename=complaints.{fmt}",
+        "Vary": "Accept-Encoding"
+    }
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        chunks = _gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
 
 
 # ================================
@@ -299,10 +979,89 @@ def apply_scheme():
 # ================================
 @app.route('/red_zones', methods=['GET'])
 def get_red_zones():
-    if os.path.exists(RED_ZONE_DATA_PATH):
-        with open(RED_ZONE_DATA_PATH, "r") as f:
-            return jsonify(json.load(f))
-    return jsonify({"zones": []})
+    sync_red_zones()
+    if request.args.get("zoom") is not None or request.args.get("bbox") is not None:
+        return get_red_zones_viewport()
+    if request.args.get("window"):
+        return get_red_zones_window(request.args["window"])
+
+    body, etag, last_modified = red_zone_snapshot.current()
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def get_red_zones_viewport():
+    """/red_zones?zoom=<z>&bbox=min_lat,min_lon,max_lat,max_lon: only the pyramid cells in view."""
+    try:
+        zoom = float(request.args["zoom"])
+        min_lat, min_lon, max_lat, max_lon = parse_bbox(request.args["bbox"])
+        if not (0 <= zoom <= 24 and min_lat <= max_lat and min_lon <= max_lon):
+            raise ValueError
+    except (KeyError, ValueError):
+        return jsonify({"message": "zoom and bbox=min_lat,min_lon,max_lat,max_lon are required together"}), 400
+
+    with red_zone_snapshot.lock:
+        map_data = red_zone_detector.get_viewport_data(zoom, min_lat, min_lon, max_lat, max_lon)
+    body = json.dumps(map_data, separators=(',', ':')).encode('utf-8')
+    response = Response(body, mimetype="application/json")
+    response.add_etag()
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def get_red_zones_window(window):
+    """/red_zones?window=24h|7d|30d: zones classified on recent complaints only."""
+    try:
+        with red_zone_snapshot.lock:
+            map_data = red_zone_detector.get_map_data(window, epoch_seconds(datetime.utcnow()))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    body = json.dumps(map_data, separators=(',', ':')).encode('utf-8')
+    response = Response(body, mimetype="application/json")
+    response.add_etag()
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+# ================================
+# Complaint Groups API
+# ================================
+GROUPS_PAGE_DEFAULT = 20
+GROUPS_PAGE_MAX = 200
+
+
+@app.route('/groups/priority', methods=['GET'])
+def get_priority_groups():
+    """
+    Worst complaint groups first for department dashboards, served from the maintained priority index.
+    Query: category, min_priority, offset, limit.
+    """
+    try:
+        min_priority = request.args.get("min_priority")
+        min_priority = int(min_priority) if min_priority is not None else None
+        offset = max(int(request.args.get("offset", 0)), 0)
+        limit = min(max(int(request.args.get("limit", GROUPS_PAGE_DEFAULT)), 1), GROUPS_PAGE_MAX)
+    except ValueError:
+        return jsonify({"message": "Invalid min_priority, offset or limit"}), 400
+    category = request.args.get("category") or ALL_CATEGORIES
+
+    index = model_registry.get('group_priority_index')
+    groups = model_registry.get('complaint_groups')
+    page = index.query(category, min_priority, offset, limit)
+    for entry in page:
+        group = groups.get(entry['group_id'])
+        if group is not None:
+            entry['center_latitude'] = float(group['center_latitude'])
+            entry['center_longitude'] = float(group['center_longitude'])
+    total = index.count(category, min_priority)
+    return jsonify({
+        "groups": page,
+        "total": total,
+        "next_offset": offset + len(page) if offset + len(page) < total else None
+    })
 
 
 # ================================
@@ -315,13 +1074,41 @@ def speak():
     if not message:
         return jsonify({"message": "No text provided"}), 400
 
-    filename = f"speak_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.wav"
-    filepath = text_to_speech_file(message, filename)
+    job = tts_service.submit(message)
+    if job["status"] == "done":
+        return jsonify({
+            "message": "Audio generated",
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "file": f"/uploads/audio/{job['file']}"
+        })
 
     return jsonify({
-        "message": "Audio generated",
-        "file": f"/uploads/audio/{filename}"
-    })
+        "message": "Audio queued",
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "poll": f"/speak/{job['job_id']}"
+    }), 202
+
+
+@app.route('/speak/<job_id>', methods=['GET'])
+def speak_status(job_id):
+    """Poll a TTS job; ?wait=N blocks up to N seconds (max 30) until it finishes."""
+    try:
+        wait = min(max(float(request.args.get("wait", 0)), 0), 30)
+    except ValueError:
+        return jsonify({"message": "Invalid wait"}), 400
+
+    job = tts_service.get(job_id, wait=wait)
+    if job is None:
+        return jsonify({"message": "Job not found"}), 404
+
+    result = {"job_id": job["job_id"], "status": job["status"]}
+    if job["status"] == "done":
+        result["file"] = f"/uploads/audio/{job['file']}"
+    elif job["status"] == "failed":
+        result["error"] = job["error"]
+    return jsonify(result)
 
 
 # ================================
@@ -329,17 +1116,42 @@ def speak():
 # ================================
 @app.route('/uploads/photos/<filename>')
 def get_photo(filename):
-    return send_from_directory(UPLOAD_FOLDER_PHOTOS, filename)
+    return send_media(UPLOAD_FOLDER_PHOTOS, filename)
 
 
 @app.route('/uploads/videos/<filename>')
 def get_video(filename):
-    return send_from_directory(UPLOAD_FOLDER_VIDEOS, filename)
+    return send_media(UPLOAD_FOLDER_VIDEOS, filename)
 
 
 @app.route('/uploads/audio/<filename>')
 def get_audio(filename):
-    return send_from_directory(UPLOAD_FOLDER_AUDIO, filename)
+    return send_media(UPLOAD_FOLDER_AUDIO, filename)
+
+
+# ================================
+# Health / startup timing
+# ================================
+@app.route('/health', methods=['GET'])
+def health():
+    return jsonify({
+        "status": "ok",
+        "pid": os.getpid(),
+        "startup_seconds": STARTUP_SECONDS,
+        "models": model_registry.status(),
+        "embedding_cache": model_registry.get('sentence_model').metrics()
+        if model_registry.is_loaded('sentence_model') else None,
+        "sms_queue": sms_queue.metrics() if sms_queue else None
+    })
+
+
+# Comma-separated registry names to load at import time, e.g. under `gunicorn --preload`
+# so forked workers share the weights copy-on-write.
+PRELOAD_MODELS = [name.strip() for name in os.getenv("PRELOAD_MODELS", "").split(",") if name.strip()]
+if PRELOAD_MODELS:
+    model_registry.preload(PRELOAD_MODELS)
+
+STARTUP_SECONDS = round(time.perf_counter() - APP_IMPORT_STARTED, 3)
 
 
 # ================================
@@ -0,0 +1,97 @@
+# benchmarks/ann_merge.py
+#
+# Recall and latency of the approximate group indexes against exact search,
+# on synthetic complaints shaped like merge_similer.ipynb.
+# Run from the repo root:
+#   python -m benchmarks.ann_merge [--groups 100000] [--queries 1000] [--random-embeddings]
+#
+# --random-embeddings swaps SentenceTransformer for a fixed random vector per template,
+# for machines without the model weights.
+
+import argparse
+import time
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from ann_index import ExactIndex, IVFIndex, HNSWIndex, SpatialPrefilter, hnswlib
+from benchmarks.synthetic import generate_complaints
+
+
+def embed_texts(texts, random_embeddings, dim=384, seed=0):
+    unique = sorted(set(texts))
+    if random_embeddings:
+        rng = np.random.default_rng(seed)
+        vectors = rng.normal(size=(len(unique), dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    else:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+        vectors = np.asarray(model.encode(unique), dtype=np.float32)
+    lookup = {text: i for i, text in enumerate(unique)}
+    return vectors[[lookup[t] for t in texts]]
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q)) * 1000
+
+
+def run(name, index, queries, query_coords, exact_results, spatial=None):
+    latencies, hits = [], 0
+    for query, (lat, lon), exact in zip(queries, query_coords, exact_results):
+        start = time.perf_counter()
+        candidates = spatial.candidates(lat, lon) if spatial is not None else None
+        found = index.search(query, k=1, candidates=candidates)
+        latencies.append(time.perf_counter() - start)
+        # Ties are common (templates repeat), so a hit is any result as close as the exact one.
+        if found and found[0][1] <= exact[1] + 1e-4:
+            hits += 1
+    print(f"{name:<22} recall@1={hits / len(queries):.3f}  "
+          f"p50={percentile_ms(latencies, 50):.3f} ms  p99={percentile_ms(latencies, 99):.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--groups', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--radius', type=float, default=1000, help='spatial prefilter radius in meters')
+    parser.add_argument('--random-embeddings', action='store_true')
+    args = parser.parse_args()
+
+    df = generate_complaints(args.groups + args.queries, radius_meters=300)
+    embeddings = embed_texts(df['complaint'].tolist(), args.random_embeddings)
+    coords = df[['latitude', 'longitude']].to_numpy()
+    scaler = StandardScaler().fit(coords[:args.groups])
+    features = np.hstack((embeddings, scaler.transform(coords).astype(np.float32)))
+
+    keys = df['complaint_id'].tolist()[:args.groups]
+    group_features, queries = features[:args.groups], features[args.groups:]
+    group_coords, query_coords = coords[:args.groups], coords[args.groups:]
+    print(f"📊 {args.groups} groups, {args.queries} queries, dim={features.shape[1]}")
+
+    spatial = SpatialPrefilter(args.radius)
+    for key, (lat, lon) in zip(keys, group_coords):
+        spatial.add(key, lat, lon)
+
+    exact = ExactIndex()
+    exact.build(keys, group_features)
+    exact_results = [exact.search(q, k=1)[0] for q in queries]
+
+    indexes = [("exact", exact)]
+    start = time.perf_counter()
+    ivf = IVFIndex(nlist=256, nprobe=8)
+    ivf.build(keys, group_features)
+    print(f"🏗️  IVF build: {time.perf_counter() - start:.2f} s")
+    indexes.append(("ivf(nlist=256,nprobe=8)", ivf))
+    if hnswlib is not None:
+        start = time.perf_counter()
+        hnsw = HNSWIndex()
+        hnsw.build(keys, group_features)
+        print(f"🏗️  HNSW build: {time.perf_counter() - start:.2f} s")
+        indexes.append(("hnsw", hnsw))
+    else:
+        print("⚠️ hnswlib not installed, skipping HNSW")
+
+    for name, index in indexes:
+        run(name, index, queries, query_coords, exact_results)
+        run(name + "+spatial", index, queries, query_coords, exact_results, spatial=spatial)
@@ -0,0 +1,55 @@
+# benchmarks/bulk_ingest.py
+#
+# Rows/sec for POST /complaints (one request per complaint) versus POST /complaints/bulk,
+# against a throwaway SQLite database.
+# Run from the repo root:  python -m benchmarks.bulk_ingest [n_complaints]
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+workdir = tempfile.mkdtemp(prefix="bulk_ingest_")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(workdir, "bench.db")
+os.environ["RED_ZONE_DATA_PATH"] = os.path.join(workdir, "red_zone_map_data.json")
+
+from app import app  # noqa: E402  (env must be set before the app configures its engine)
+from benchmarks.synthetic import generate_complaints  # noqa: E402
+
+
+def report(name, result, elapsed):
+    # Synthetic complaints repeat a lot, so most rows are merged into an existing complaint's count
+    processed = result['inserted'] + result['merged']
+    print(f"✅ {name} {processed / elapsed:,.0f} rows/sec "
+          f"({result['inserted']} inserted, {result['merged']} merged as duplicates)")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    client = app.test_client()
+    otp = client.post('/register', json={"phone": "9000000000", "name": "bench"}).json["otp"]
+    user_id = client.post('/login', json={"phone": "9000000000", "otp": otp}).json["user_id"]
+
+    df = generate_complaints(n)
+    items = [
+        {"user_id": user_id, "text": row.complaint, "category": row.category,
+         "gps_lat": row.latitude, "gps_lon": row.longitude}
+        for row in df.itertuples()
+    ]
+
+    single_n = min(n, 500)
+    start = time.perf_counter()
+    for item in items[:single_n]:
+        client.post('/complaints', data=item)
+    single_rate = single_n / (time.perf_counter() - start)
+    print(f"🐢 POST /complaints:           {single_rate:,.0f} rows/sec ({single_n} rows)")
+
+    start = time.perf_counter()
+    result = client.post('/complaints/bulk', json=items).json
+    report("POST /complaints/bulk JSON:  ", result, time.perf_counter() - start)
+
+    body = "\n".join(json.dumps(item) for item in items)
+    start = time.perf_counter()
+    result = client.post('/complaints/bulk', data=body, content_type="application/x-ndjson").json
+    report("POST /complaints/bulk NDJSON:", result, time.perf_counter() - start)
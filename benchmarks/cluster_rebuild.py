@@ -0,0 +1,92 @@
+# benchmarks/cluster_rebuild.py
+#
+# Global sklearn DBSCAN (as in merge_similer.ipynb) vs the tiled rebuild in cluster_rebuild.py,
+# then an incremental run after 1% new complaints. Agreement is the adjusted Rand index of the labels.
+# Run from the repo root:
+#   python -m benchmarks.cluster_rebuild [--complaints 20000] [--districts 16] [--workers N] [--standardize-gps]
+#
+# Complaints are the notebook's synthetic hotspots, copied into a grid of districts to reach city scale.
+# Embeddings are a fixed random unit vector per text, so no model weights are needed.
+
+import argparse
+import hashlib
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import DBSCAN
+from sklearn.metrics import adjusted_rand_score
+
+from benchmarks.synthetic import generate_complaints
+from cluster_rebuild import TiledDBSCAN, rebuild
+
+
+class RandomTextEncoder:
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def encode(self, texts):
+        vectors = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.sha1(text.encode()).digest()[:8], 'little')
+            v = np.random.default_rng(seed).normal(size=self.dim)
+            vectors.append(v / np.linalg.norm(v))
+        return np.array(vectors, dtype=np.float32)
+
+
+def city_complaints(n, districts, seed=42):
+    side = int(np.ceil(np.sqrt(districts)))
+    df = generate_complaints(n, seed=seed)
+    district = np.random.default_rng(seed).integers(0, districts, n)
+    df['latitude'] += (district // side) * 0.1
+    df['longitude'] += (district % side) * 0.1
+    df['complaint_id'] = np.arange(1, n + 1)
+    return df
+
+
+def labels_by_id(df, complaint_groups):
+    labels = pd.Series(-1, index=df['complaint_id'])
+    for i, group in enumerate(complaint_groups.values()):
+        labels[[c['complaint_id'] for c in group['complaints']]] = i
+    return labels.to_numpy()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--complaints', type=int, default=20_000)
+    parser.add_argument('--districts', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--gps-unit-meters', type=float, default=500)
+    parser.add_argument('--standardize-gps', action='store_true', help="notebook scaling instead of a fixed unit")
+    args = parser.parse_args()
+
+    encoder = RandomTextEncoder()
+    df = city_complaints(args.complaints, args.districts)
+    gps_unit_meters = None if args.standardize_gps else args.gps_unit_meters
+    clusterer = TiledDBSCAN(eps=0.5, min_samples=3, gps_unit_meters=gps_unit_meters, workers=args.workers)
+
+    embeddings = encoder.encode(df['complaint'].tolist())
+    latlon = df[['latitude', 'longitude']].to_numpy()
+    mean, scale = clusterer.fit_scaler(latlon)
+    start = time.perf_counter()
+    global_labels = DBSCAN(eps=0.5, min_samples=3).fit_predict(np.hstack((embeddings, (latlon - mean) / scale)))
+    global_s = time.perf_counter() - start
+    print(f"🐢 global DBSCAN: {global_s:.2f}s, {global_labels.max() + 1} clusters")
+
+    with tempfile.TemporaryDirectory() as state:
+        groups, stats = rebuild(df, clusterer, encoder=encoder, state_path=state)
+        ari = adjusted_rand_score(global_labels, labels_by_id(df, groups))
+        print(f"✅ tiled full:    {stats['seconds']:.2f}s, {stats['groups']} clusters, "
+              f"{stats['tiles']} tiles, ARI vs global {ari:.4f}")
+
+        extra = city_complaints(max(1, args.complaints // 100), args.districts, seed=7)
+        extra['complaint_id'] += args.complaints
+        grown = pd.concat([df, extra], ignore_index=True)
+        groups, stats = rebuild(grown, clusterer, encoder=encoder, state_path=state)
+        print(f"✅ incremental:   {stats['seconds']:.2f}s after +{len(extra)} complaints, "
+              f"{stats['reclustered_tiles']}/{stats['tiles']} tiles reclustered, {stats['encoded']} encoded")
+
+        fresh, _ = rebuild(grown, clusterer, encoder=encoder)
+        ari = adjusted_rand_score(labels_by_id(grown, fresh), labels_by_id(grown, groups))
+        print(f"   incremental vs full rebuild ARI {ari:.4f}")
@@ -0,0 +1,63 @@
+# benchmarks/dedup.py
+#
+# Precision, recall, throughput and memory of the ingestion-time near-duplicate index,
+# on synthetic complaints with light rewording (extra words, dropped words, casing, punctuation).
+# A merge is correct when the matched complaint came from the same template in the same grid cell.
+# Run from the repo root:  python -m benchmarks.dedup [n_complaints]
+
+import random
+import sys
+import time
+
+from benchmarks.synthetic import generate_complaints
+from dedup import NearDuplicateIndex
+
+FILLERS = ["please help", "urgent", "since yesterday", "in our colony", "kindly resolve", "!!!", "again"]
+
+
+def reword(text, rnd):
+    words = text.split()
+    if len(words) > 4 and rnd.random() < 0.3:
+        del words[rnd.randrange(len(words))]
+    if rnd.random() < 0.5:
+        words.insert(rnd.randrange(len(words) + 1), rnd.choice(FILLERS))
+    text = " ".join(words)
+    return text.upper() if rnd.random() < 0.1 else text
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    df = generate_complaints(n, radius_meters=300)
+    rnd = random.Random(7)
+    index = NearDuplicateIndex()
+
+    # One synthetic minute per complaint, so the 24 h window holds the last 1440 complaints
+    seen = {}         # (template, cell) -> last timestamp
+    template_of = {}  # key -> (template, cell)
+    merges = correct = should_merge = merged_when_should = 0
+
+    start = time.perf_counter()
+    for i, row in enumerate(df.itertuples()):
+        timestamp = i * 60.0
+        cell = index.grid._get_grid_id(row.latitude, row.longitude)
+        truth = (row.complaint, cell)
+        last = seen.get(truth)
+        expected = last is not None and timestamp - last <= index.window_seconds
+
+        key, _ = index.find(reword(row.complaint, rnd), row.latitude, row.longitude, timestamp)
+        if expected:
+            should_merge += 1
+        if key is not None:
+            merges += 1
+            correct += template_of[key] == truth
+            merged_when_should += expected
+        else:
+            index.add(i, row.complaint, row.latitude, row.longitude, timestamp)
+            template_of[i] = truth
+            seen[truth] = timestamp
+    elapsed = time.perf_counter() - start
+
+    print(f"📊 {n} complaints, {merges} merged into an existing complaint")
+    print(f"   precision={correct / max(merges, 1):.3f}  recall={merged_when_should / max(should_merge, 1):.3f}")
+    print(f"   throughput={n / elapsed:,.0f} complaints/sec (find + add)")
+    print(f"   index: {len(index)} live entries, ~{index.memory_bytes() / 1024:.0f} KiB of signatures and buckets")
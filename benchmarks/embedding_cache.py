@@ -0,0 +1,58 @@
+# benchmarks/embedding_cache.py
+#
+# Transformer calls saved by the embedding cache on the notebook's repetitive complaint texts:
+# a worker with a cold cache, then a second worker (fresh process state) sharing the SQLite tier.
+# Run from the repo root:  python -m benchmarks.embedding_cache [n_complaints] [--model]
+#
+# Without --model, encoding is simulated at ENCODE_MS per text with a fixed random vector per text,
+# so no model weights are needed.
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.cluster_rebuild import RandomTextEncoder
+from benchmarks.synthetic import generate_complaints
+from embedding_cache import CachedEncoder
+
+ENCODE_MS = 2.0
+MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+
+
+class SimulatedModel(RandomTextEncoder):
+    def encode(self, texts, **kwargs):
+        time.sleep(len(texts) * ENCODE_MS / 1000)
+        return super().encode(texts)
+
+
+def run(name, encoder, texts, batch=32):
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch):
+        encoder.encode(texts[i:i + batch])
+    elapsed = time.perf_counter() - start
+    m = encoder.metrics()
+    print(f"✅ {name}: {elapsed:.2f}s, hit rate {m['hit_rate']:.3f} "
+          f"(lru {m['hits']}, disk {m['disk_hits']}, encoded {m['misses']}, evicted {m['evictions']})")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else 20_000
+    if '--model' in sys.argv:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(MODEL_NAME)
+    else:
+        model = SimulatedModel()
+    texts = generate_complaints(n)['complaint'].tolist()
+    # Real reports vary in case and spacing even when the words are the same
+    texts = [t.upper() if i % 7 == 0 else f"  {t} " if i % 5 == 0 else t for i, t in enumerate(texts)]
+
+    start = time.perf_counter()
+    for i in range(0, min(n, 2000), 32):
+        model.encode(texts[i:i + 32])
+    print(f"🐢 uncached: {(time.perf_counter() - start) * n / min(n, 2000):.2f}s (extrapolated from 2000 texts)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "embedding_cache.sqlite3")
+        run("worker 1 (cold)", CachedEncoder(model, MODEL_NAME, max_entries=1000, disk_path=path), texts)
+        run("worker 2 (shared disk tier)", CachedEncoder(model, MODEL_NAME, max_entries=1000, disk_path=path), texts)
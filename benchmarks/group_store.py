@@ -0,0 +1,87 @@
+# benchmarks/group_store.py
+#
+# Load time and resident memory of the complaint-group package: pickle vs the mmapped GroupStore.
+# Each loader runs in a fresh interpreter so the numbers are what a new worker pays.
+# Run from the repo root:  python -m benchmarks.group_store [n_complaints]
+
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from benchmarks.synthetic import generate_complaints
+from group_store import convert_model_package
+
+GROUP_SIZE = 5
+
+LOADER = """
+import json, pickle, resource, sys, time
+def rss_kb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+import numpy
+from group_store import GroupStore
+before = rss_kb()
+start = time.perf_counter()
+if sys.argv[1] == 'pickle':
+    with open(sys.argv[2], 'rb') as f:
+        groups = pickle.load(f)['complaint_groups']
+else:
+    groups = GroupStore(sys.argv[2])
+elapsed = time.perf_counter() - start
+first = next(iter(groups))
+lookup_start = time.perf_counter()
+for _ in range(1000):
+    len(groups[first]['complaints'])
+lookup = (time.perf_counter() - lookup_start) / 1000
+print(json.dumps({'seconds': elapsed, 'rss_mb': (rss_kb() - before) / 1024, 'lookup_us': lookup * 1e6}))
+"""
+
+
+def make_package(n):
+    df = generate_complaints(n)
+    groups = {}
+    for start in range(0, n, GROUP_SIZE):
+        rows = df.iloc[start:start + GROUP_SIZE]
+        group_id = f"G{start // GROUP_SIZE:06d}"
+        groups[group_id] = {
+            'group_id': group_id,
+            'priority': int(len(rows) * 9),
+            'complaints': [
+                {'complaint_id': int(r.complaint_id), 'complaint': r.complaint, 'latitude': float(r.latitude),
+                 'longitude': float(r.longitude), 'category': r.category, 'cluster_id': start // GROUP_SIZE}
+                for r in rows.itertuples()
+            ],
+            'center_latitude': np.float64(rows.latitude.mean()),
+            'center_longitude': np.float64(rows.longitude.mean()),
+            'category': rows.category.iloc[0]
+        }
+    return {'complaint_groups': groups, 'config': {}, 'total_groups': len(groups), 'total_complaints': n}
+
+
+def measure(kind, path):
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", LOADER, kind, path], capture_output=True, text=True,
+                         check=True, cwd=repo_root)
+    return json.loads(out.stdout)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as tmp:
+        pkl_path = os.path.join(tmp, "complaint_clustering_model.pkl")
+        store_path = os.path.join(tmp, "complaint_groups")
+        with open(pkl_path, "wb") as f:
+            pickle.dump(make_package(n), f)
+        convert_model_package(pkl_path, store_path)
+
+        for kind, path in (("pickle", pkl_path), ("store", store_path)):
+            result = measure(kind, path)
+            icon = "🐢" if kind == "pickle" else "✅"
+            print(f"{icon} {kind:6s}: open {result['seconds'] * 1000:8.1f} ms, "
+                  f"+{result['rss_mb']:7.1f} MB RSS, group lookup {result['lookup_us']:.1f} µs "
+                  f"({n} complaints in {n // GROUP_SIZE} groups)")
@@ -0,0 +1,67 @@
+# benchmarks/media_serving.py
+#
+# Bytes transferred and latency for seek-heavy video review, served through send_media:
+#   - full download per seek/page load (what a client without Range/caching does)
+#   - ranged seeks (206 Partial Content)
+#   - revisits revalidated with If-None-Match (304 Not Modified)
+# Run from the repo root:  python -m benchmarks.media_serving [size_mb] [seeks]
+
+import hashlib
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from flask import Flask
+
+from media_store import send_media
+
+SEEK_WINDOW = 2 * 1024 * 1024  # bytes a player typically fetches after a seek
+
+
+def timed(client, path, headers=None):
+    start = time.perf_counter()
+    response = client.get(path, headers=headers or {})
+    body = response.get_data()
+    return response, len(body), time.perf_counter() - start
+
+
+def report(name, status, total_bytes, latencies):
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2] * 1000
+    print(f"{name:<22} status={status}  bytes={total_bytes / 1e6:9.1f} MB  p50={p50:7.2f} ms")
+
+
+if __name__ == "__main__":
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    seeks = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    folder = tempfile.mkdtemp(prefix="media_bench_")
+    data = os.urandom(size_mb * 1024 * 1024)
+    filename = hashlib.sha256(data).hexdigest() + ".mp4"
+    with open(os.path.join(folder, filename), "wb") as f:
+        f.write(data)
+
+    app = Flask(__name__)
+    app.add_url_rule("/uploads/videos/<filename>", "video", lambda filename: send_media(folder, filename))
+    client = app.test_client()
+    path = f"/uploads/videos/{filename}"
+
+    results = [timed(client, path) for _ in range(seeks)]
+    report("full download / seek", results[0][0].status_code, sum(r[1] for r in results), [r[2] for r in results])
+    etag = results[0][0].headers["ETag"]
+    print(f"   Cache-Control: {results[0][0].headers['Cache-Control']}  ETag: {etag}")
+
+    rng = random.Random(0)
+    results = []
+    for _ in range(seeks):
+        start = rng.randrange(0, len(data) - SEEK_WINDOW)
+        results.append(timed(client, path, {"Range": f"bytes={start}-{start + SEEK_WINDOW - 1}"}))
+    report("ranged seek", results[0][0].status_code, sum(r[1] for r in results), [r[2] for r in results])
+
+    results = [timed(client, path, {"If-None-Match": etag}) for _ in range(seeks)]
+    report("revalidated revisit", results[0][0].status_code, sum(r[1] for r in results), [r[2] for r in results])
+
+    shutil.rmtree(folder)
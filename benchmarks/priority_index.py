@@ -0,0 +1,64 @@
+# benchmarks/priority_index.py
+#
+# Dashboard queries on the complaint groups: full scan (the old get_high_priority_groups) vs
+# the maintained GroupPriorityIndex, plus the cost of re-positioning a group after a merge.
+# Run from the repo root:  python -m benchmarks.priority_index [n_groups]
+
+import random
+import sys
+import time
+
+from priority_index import ALL, GroupPriorityIndex
+
+CATEGORIES = ["Water", "Electricity", "Garbage", "Road", "Parking", "Drainage", "Fire", "Other"]
+
+
+def make_groups(n, seed=42):
+    rng = random.Random(seed)
+    groups = {}
+    for i in range(n):
+        size = int(rng.paretovariate(1.2))
+        groups[f"G{i:06d}"] = {'priority': size, 'complaints': [None] * size, 'category': rng.choice(CATEGORIES)}
+    return groups
+
+
+def scan_top(groups, k, category, min_priority):
+    matching = [
+        (data['priority'], len(data['complaints']), group_id) for group_id, data in groups.items()
+        if data['priority'] >= min_priority and (category is None or data['category'] == category)
+    ]
+    matching.sort(key=lambda t: (-t[0], -t[1], t[2]))
+    return [group_id for _, _, group_id in matching[:k]]
+
+
+def per_call_us(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    groups = make_groups(n)
+
+    start = time.perf_counter()
+    index = GroupPriorityIndex(groups)
+    print(f"✅ index build: {(time.perf_counter() - start) * 1000:.1f} ms for {n} groups")
+
+    assert [g['group_id'] for g in index.query('Water', 3, 0, 20)] == scan_top(groups, 20, 'Water', 3)
+    scan_us = per_call_us(lambda: scan_top(groups, 20, 'Water', 3), 5)
+    index_us = per_call_us(lambda: index.query('Water', 3, 0, 20), 2000)
+    print(f"🐢 scan top-20 Water >= 3:  {scan_us:,.0f} µs")
+    print(f"✅ index top-20 Water >= 3: {index_us:,.1f} µs")
+
+    ids = list(groups)
+
+    def merge():
+        group_id = random.choice(ids)
+        data = groups[group_id]
+        data['complaints'].append(None)
+        data['priority'] += 1
+        index.upsert(group_id, data)
+    print(f"✅ upsert after merge: {per_call_us(merge, 10_000):.1f} µs")
+    assert [g['group_id'] for g in index.query(ALL, None, 100, 50)] == scan_top(groups, 150, None, 0)[100:]
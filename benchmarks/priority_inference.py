@@ -0,0 +1,65 @@
+# benchmarks/priority_inference.py
+#
+# Throughput and latency of PriorityPredictor: fp32 single-complaint calls versus
+# predict_batch, and the int8 dynamic-quantized variant, with the prediction
+# agreement of int8 against fp32 (labels "high" = Fire complaints for a rough accuracy).
+# Run from the repo root (needs priority_prediction_model.pth):
+#   python -m benchmarks.priority_inference [--n 512] [--batch-size 32] [--threads 4]
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import generate_complaints
+from priority_pridiction import PriorityPredictor
+
+
+def single_latencies(predictor, texts):
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        predictor.predict(text)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies)
+
+
+def batch_throughput(predictor, texts, batch_size):
+    start = time.perf_counter()
+    predictions = predictor.predict_batch(texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    return predictions, len(texts) / elapsed
+
+
+def report(name, latencies, throughput):
+    print(f"{name:<6} single: p50={np.percentile(latencies, 50) * 1000:.1f} ms "
+          f"p99={np.percentile(latencies, 99) * 1000:.1f} ms | batch: {throughput:.1f} complaints/sec")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model-path', default='priority_prediction_model.pth')
+    parser.add_argument('--n', type=int, default=512)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--threads', type=int, default=None)
+    args = parser.parse_args()
+
+    df = generate_complaints(args.n)
+    texts = df['complaint'].tolist()
+    labels = np.where(df['category'] == 'Fire', 'high', 'low')
+    single_sample = texts[:min(len(texts), 200)]
+
+    results = {}
+    for name, quantize in (("fp32", False), ("int8", True)):
+        predictor = PriorityPredictor(args.model_path, quantize=quantize, num_threads=args.threads)
+        predictor.predict_batch(texts[:args.batch_size])  # warm-up
+        latencies = single_latencies(predictor, single_sample)
+        predictions, throughput = batch_throughput(predictor, texts, args.batch_size)
+        results[name] = np.array([p['predicted_priority'] for p in predictions])
+        report(name, latencies, throughput)
+
+    fp32_accuracy = (results['fp32'] == labels).mean()
+    int8_accuracy = (results['int8'] == labels).mean()
+    agreement = (results['fp32'] == results['int8']).mean()
+    print(f"📊 accuracy fp32={fp32_accuracy:.3f} int8={int8_accuracy:.3f} "
+          f"(delta {int8_accuracy - fp32_accuracy:+.3f}); int8 agrees with fp32 on {agreement:.1%}")
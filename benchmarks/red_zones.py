@@ -0,0 +1,53 @@
+# benchmarks/red_zones.py
+#
+# Times a city-scale historical red-zone rebuild.
+# Run from the repo root:  python -m benchmarks.red_zones [n_complaints]
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from red_zone_processor import RedZoneDetector
+
+# Same hotspot area as the synthetic data in merge_similer.ipynb (Nainital district)
+CENTER_LAT, CENTER_LON = 29.385, 79.463
+
+
+def make_complaints(n, seed=42):
+    rng = np.random.default_rng(seed)
+    lats = CENTER_LAT + rng.normal(0, 0.03, n)
+    lons = CENTER_LON + rng.normal(0, 0.03, n)
+    return pd.DataFrame({"latitude": lats, "longitude": lons})
+
+
+def legacy_assign(detector, complaints):
+    """Per-row path the detector used before the batch API (iterrows + _get_grid_id)."""
+    grid_data = {}
+    for _, row in complaints.iterrows():
+        grid_id = detector._get_grid_id(row['latitude'], row['longitude'])
+        if grid_id not in grid_data:
+            grid_data[grid_id] = {'count': 0, 'complaints': []}
+        grid_data[grid_id]['count'] += 1
+        grid_data[grid_id]['complaints'].append(row.to_dict())
+    return grid_data
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    df = make_complaints(n)
+    detector = RedZoneDetector()
+
+    start = time.perf_counter()
+    detector.assign_complaints_to_grids(df)
+    map_data = detector.get_map_data()
+    batch_s = time.perf_counter() - start
+    print(f"✅ batch: {n} complaints -> {len(map_data['zones'])} zones in {batch_s * 1000:.1f} ms")
+
+    sample = df.head(min(n, 10_000))
+    start = time.perf_counter()
+    legacy_assign(detector, sample)
+    legacy_s = (time.perf_counter() - start) * n / len(sample)
+    print(f"🐢 iterrows (extrapolated from {len(sample)} rows): {legacy_s * 1000:.1f} ms")
+    print(f"📊 speedup: {legacy_s / batch_s:.0f}x")
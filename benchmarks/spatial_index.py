@@ -0,0 +1,56 @@
+# benchmarks/spatial_index.py
+#
+# "Within 300 m of here" and map-viewport queries: vectorized full scan over every complaint vs
+# the GridSpatialIndex behind /complaints/near and /complaints/bbox.
+# Run from the repo root:  python -m benchmarks.spatial_index [n_complaints]
+
+import sys
+import time
+
+import numpy as np
+
+from spatial_index import GridSpatialIndex, haversine_meters
+
+
+def per_call_us(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(42)
+    # A city roughly 40 km across, denser towards the center
+    lats = 17.385 + rng.normal(0, 0.08, n)
+    lons = 78.486 + rng.normal(0, 0.08, n)
+    ids = np.arange(1, n + 1)
+
+    start = time.perf_counter()
+    index = GridSpatialIndex(cell_meters=250)
+    index.add_batch(ids, lats, lons)
+    print(f"✅ index build: {(time.perf_counter() - start) * 1000:.0f} ms for {n:,} complaints")
+
+    lat, lon, radius = 17.40, 78.50, 300
+
+    def scan_near():
+        distances = haversine_meters(lat, lon, lats, lons)
+        inside = np.flatnonzero(distances <= radius)
+        return ids[inside[np.argsort(distances[inside], kind='stable')]].tolist()
+
+    expected = scan_near()
+    assert [key for key, _ in index.near(lat, lon, radius)] == expected
+    print(f"   {len(expected)} complaints within {radius} m")
+    print(f"🐢 scan near:  {per_call_us(scan_near, 5):,.0f} µs")
+    print(f"✅ index near: {per_call_us(lambda: index.near(lat, lon, radius, 50), 500):,.0f} µs")
+
+    box = (17.395, 78.490, 17.405, 78.500)
+
+    def scan_bbox():
+        inside = (lats >= box[0]) & (lats <= box[2]) & (lons >= box[1]) & (lons <= box[3])
+        return ids[inside].tolist()
+
+    assert sorted(index.within(*box)) == scan_bbox()
+    print(f"🐢 scan bbox:  {per_call_us(scan_bbox, 5):,.0f} µs")
+    print(f"✅ index bbox: {per_call_us(lambda: index.within(*box, limit=500), 500):,.0f} µs")
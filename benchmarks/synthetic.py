@@ -0,0 +1,110 @@
+# benchmarks/synthetic.py
+#
+# Synthetic complaint generator shared by the benchmark scripts.
+# Mirrors the templates and hotspots used in merge_similer.ipynb.
+
+import random
+
+import numpy as np
+import pandas as pd
+
+complaint_templates = {
+    "Water": [
+        "No water supply since morning in my area",
+        "Drinking water pipeline is leaking badly",
+        "Water supply is irregular for the last 3 days",
+        "The tap water is muddy and not clean",
+        "Water tank in my street is overflowing",
+        "Broken water line on main street",
+        "Hydrant is leaking badly"
+    ],
+    "Electricity": [
+        "Power cut in my area for more than 2 hours",
+        "Street lights are not working for 3 days",
+        "Voltage fluctuation is damaging appliances",
+        "Complete blackout in our building since last night",
+        "Transformer making loud noise near my house",
+        "Wires are sparking near the school",
+        "A power pole is leaning dangerously"
+    ],
+    "Garbage": [
+        "Garbage has not been collected for a week",
+        "Overflowing dustbins causing foul smell",
+        "Stray dogs scattering garbage everywhere",
+        "Waste burning near my street, creating smoke",
+        "Garbage pile blocking the footpath"
+    ],
+    "Road": [
+        "Large pothole near my house, dangerous for bikers",
+        "Broken road causing traffic jam daily",
+        "Speed breakers are too high and damaging vehicles",
+        "Construction material lying on the road",
+        "Rainwater logged on road making it slippery",
+        "Road has large cracks and needs repair",
+        "Fallen tree blocking the street"
+    ],
+    "Parking": [
+        "Cars are being parked illegally blocking my gate",
+        "Too many vehicles parked on footpath",
+        "No space left in residential parking area",
+        "Trucks parked on narrow road blocking way",
+        "People are parking on both sides of the road"
+    ],
+    "Drainage": [
+        "Drainage water overflowing on the street",
+        "Manhole cover is missing, dangerous for children",
+        "Blocked drainage causing bad smell",
+        "Sewage water mixing with drinking water",
+        "Drainage water collected in front of my house"
+    ],
+    "Fire": [
+        "Fire broke out in a shop nearby, need urgent help",
+        "Smoke coming from an apartment, possible fire",
+        "Small fire in garbage dump spreading fast",
+        "Transformer caught fire near main road",
+        "Short circuit caused fire in building basement"
+    ],
+    "Other": [
+        "Too many stray dogs chasing people",
+        "Loud construction work disturbing at night",
+        "Street flooded after yesterday's rain",
+        "Tree fallen on road blocking traffic",
+        "Unauthorized construction blocking pathway"
+    ]
+}
+
+category_hotspots = {
+    "Water": [{'lat': 29.390, 'lon': 79.460}, {'lat': 29.355, 'lon': 79.482}, {'lat': 29.399, 'lon': 79.421}],
+    "Electricity": [{'lat': 29.385, 'lon': 79.450}, {'lat': 29.361, 'lon': 79.495}, {'lat': 29.390, 'lon': 79.435}],
+    "Garbage": [{'lat': 29.395, 'lon': 79.455}, {'lat': 29.378, 'lon': 79.470}, {'lat': 29.385, 'lon': 79.442}],
+    "Road": [{'lat': 29.401, 'lon': 79.452}, {'lat': 29.370, 'lon': 79.465}, {'lat': 29.389, 'lon': 79.480}],
+    "Parking": [{'lat': 29.388, 'lon': 79.458}, {'lat': 29.350, 'lon': 79.440}, {'lat': 29.405, 'lon': 79.455}],
+    "Drainage": [{'lat': 29.392, 'lon': 79.463}, {'lat': 29.365, 'lon': 79.445}, {'lat': 29.410, 'lon': 79.470}],
+    "Fire": [{'lat': 29.380, 'lon': 79.457}, {'lat': 29.393, 'lon': 79.459}, {'lat': 29.372, 'lon': 79.488}],
+    "Other": [{'lat': 29.397, 'lon': 79.451}, {'lat': 29.382, 'lon': 79.468}, {'lat': 29.369, 'lon': 79.475}]
+}
+
+
+def generate_complaints(n, radius_meters=30, seed=42):
+    """
+    Returns a DataFrame shaped like the notebook dataset:
+    complaint_id, complaint, latitude, longitude, category.
+    """
+    rnd = random.Random(seed)
+    categories = list(complaint_templates.keys())
+    data = []
+    for complaint_id in range(1, n + 1):
+        category = categories[(complaint_id - 1) % len(categories)]
+        hotspot = rnd.choice(category_hotspots[category])
+        complaint_text = rnd.choice(complaint_templates[category])
+
+        deg_lat_per_meter = 1 / 111111
+        deg_lon_per_meter = 1 / (111111 * np.cos(np.radians(hotspot['lat'])))
+        random_dist_meters = rnd.uniform(0, radius_meters)
+        random_angle = rnd.uniform(0, 2 * np.pi)
+
+        lat = hotspot['lat'] + random_dist_meters * np.cos(random_angle) * deg_lat_per_meter
+        lon = hotspot['lon'] + random_dist_meters * np.sin(random_angle) * deg_lon_per_meter
+        data.append([complaint_id, complaint_text, lat, lon, category])
+
+    return pd.DataFrame(data, columns=["complaint_id", "complaint", "latitude", "longitude", "category"])
@@ -0,0 +1,423 @@
+# cluster_rebuild.py
+#
+# Tiled, parallel and incremental rebuild of the complaint groups (the offline side of
+# merge_similer.ipynb). Instead of one global DBSCAN over [text embedding, scaled GPS]:
+#   1. complaints are partitioned into square tiles of the RedZoneDetector grid (2**tile_level cells wide),
+#      each widened by a halo of every complaint within eps of it in scaled-GPS units;
+#   2. tiles are clustered independently in a process pool;
+#   3. clusters are stitched across tile borders with a union-find on core points seen by two tiles.
+# Every core point keeps its full eps-neighbourhood inside its own tile, so the result matches a
+# global DBSCAN (up to the usual ambiguity of border points reachable from two clusters).
+#
+# With --state, embeddings, the GPS scaler and per-tile labels are kept between runs; the next run
+# only encodes new or edited complaints and re-clusters only tiles whose members changed.
+#
+# Nightly cron, from the repo root:
+#   python cluster_rebuild.py --state instance/cluster_state --output complaint_clustering_model.pkl \
+#       --store complaint_groups
+# Add --full to ignore the saved state, --gps-unit-meters 500 to make one GPS feature unit a fixed
+# distance (the halo then no longer grows with the city's spread).
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from red_zone_processor import RedZoneDetector
+
+STATE_VERSION = 1
+DEFAULT_MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+
+
+def _cluster_tile(features, eps, min_samples):
+    """Runs DBSCAN on one tile; returns (labels, core mask). Top-level so the process pool can pickle it."""
+    labels = np.full(len(features), -1, dtype=np.int32)
+    core = np.zeros(len(features), dtype=bool)
+    if len(features) < min_samples:
+        return labels, core
+    from sklearn.cluster import DBSCAN
+    dbscan = DBSCAN(eps=eps, min_samples=min_samples, metric='euclidean').fit(features)
+    labels[:] = dbscan.labels_
+    core[dbscan.core_sample_indices_] = True
+    return labels, core
+
+
+def _text_hashes(texts):
+    return np.array([
+        int.from_bytes(hashlib.blake2b(str(t).encode('utf-8'), digest_size=8).digest(), 'little', signed=True)
+        for t in texts
+    ], dtype=np.int64)
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = np.arange(n)
+
+    def find(self, x):
+        parent = self.parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+class TiledDBSCAN:
+    """
+    DBSCAN over [embedding, scaled GPS] partitioned on the red-zone grid.
+    `gps_unit_meters=None` standardizes GPS like the notebook; a number makes one feature unit that many meters.
+    """
+    def __init__(self, eps=0.5, min_samples=3, tile_level=3, grid_size_meters=500, gps_unit_meters=None, workers=None):
+        self.eps = eps
+        self.min_samples = min_samples
+        self.tile_level = tile_level
+        self.gps_unit_meters = gps_unit_meters
+        self.workers = workers or os.cpu_count() or 1
+        self.grid = RedZoneDetector(grid_size_meters)
+
+    def params(self):
+        return {
+            'eps': self.eps, 'min_samples': self.min_samples, 'tile_level': self.tile_level,
+            'grid_size_meters': self.grid.grid_size_meters, 'gps_unit_meters': self.gps_unit_meters
+        }
+
+    def fit_scaler(self, latlon):
+        """Returns (mean, scale) for the GPS columns."""
+        mean = latlon.mean(axis=0)
+        if self.gps_unit_meters is None:
+            scale = latlon.std(axis=0)
+            scale[scale == 0] = 1.0
+        else:
+            lat_scale = self.gps_unit_meters / 111111
+            scale = np.array([lat_scale, lat_scale / np.cos(np.radians(mean[0]))])
+        return mean, scale
+
+    def tile_keys(self, latlon):
+        grid_lat, grid_lon = self.grid._get_grid_indices(latlon[:, 0], latlon[:, 1])
+        return ((grid_lat >> self.tile_level) << 32) | ((grid_lon >> self.tile_level) & 0xFFFFFFFF)
+
+    def partition(self, latlon, scale):
+        """
+        Returns {tile_key: (core_indices, halo_indices)}. The halo is every complaint outside the
+        tile whose scaled-GPS offset from the tile's bounding box is at most eps on both axes.
+        """
+        keys = self.tile_keys(latlon)
+        tiles, inverse = np.unique(keys, return_inverse=True)
+        by_tile = np.split(np.argsort(inverse, kind='stable'), np.cumsum(np.bincount(inverse))[:-1])
+
+        d_lat, d_lon = self.eps * scale
+        order = np.argsort(latlon[:, 0], kind='stable')
+        sorted_lats = latlon[order, 0]
+        partitions = {}
+        for tile, core in zip(tiles.tolist(), by_tile):
+            lat_lo, lon_lo = latlon[core].min(axis=0)
+            lat_hi, lon_hi = latlon[core].max(axis=0)
+            lo = np.searchsorted(sorted_lats, lat_lo - d_lat, side='left')
+            hi = np.searchsorted(sorted_lats, lat_hi + d_lat, side='right')
+            candidates = order[lo:hi]
+            lons = latlon[candidates, 1]
+            candidates = candidates[(lons >= lon_lo - d_lon) & (lons <= lon_hi + d_lon) & (keys[candidates] != tile)]
+            partitions[tile] = (core, np.sort(candidates))
+        return partitions
+
+    def cluster_tiles(self, features, partitions, tiles):
+        """Clusters the given tiles, in a process pool when there is more than one worker and tile."""
+        jobs = [np.concatenate(partitions[t]) for t in tiles]
+        args = ([features[members] for members in jobs], [self.eps] * len(jobs), [self.min_samples] * len(jobs))
+        if self.workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(_cluster_tile, *args, chunksize=max(1, len(jobs) // (self.workers * 4))))
+        else:
+            results = list(map(_cluster_tile, *args))
+        return dict(zip(tiles, results))
+
+    def stitch(self, n, partitions, tile_results):
+        """
+        Merges per-tile labels into global labels (-1 = noise). A complaint that is a core point in
+        its own tile joins every cluster that claims it in a neighbouring tile; a complaint that is
+        noise at home takes a neighbour's cluster if that tile reached it.
+        """
+        offsets, total = {}, 0
+        for tile in partitions:
+            offsets[tile] = total
+            labels, _ = tile_results[tile]
+            total += int(labels.max()) + 1 if len(labels) else 0
+        uf = _UnionFind(total)
+
+        home = np.full(n, -1, dtype=np.int64)
+        home_core = np.zeros(n, dtype=bool)
+        for tile, (core_idx, _) in partitions.items():
+            labels, core = tile_results[tile]
+            local = labels[:len(core_idx)]
+            home[core_idx] = np.where(local >= 0, local + offsets[tile], -1)
+            home_core[core_idx] = core[:len(core_idx)]
+
+        fallback = np.full(n, -1, dtype=np.int64)
+        for tile, (core_idx, halo_idx) in partitions.items():
+            labels, _ = tile_results[tile]
+            halo_labels = labels[len(core_idx):]
+            claimed = halo_labels >= 0
+            for i, label in zip(halo_idx[claimed].tolist(), (halo_labels[claimed] + offsets[tile]).tolist()):
+                if home_core[i] and home[i] >= 0:
+                    uf.union(home[i], label)
+                elif fallback[i] < 0:
+                    fallback[i] = label
+
+        raw = np.where(home >= 0, home, fallback)
+        result = np.full(n, -1, dtype=np.int64)
+        roots = {}
+        for i in np.flatnonzero(raw >= 0).tolist():
+            root = uf.find(raw[i])
+            result[i] = roots.setdefault(root, len(roots))
+        return result
+
+
+class ClusterState:
+    """Embeddings, scaler and per-tile labels of the last run, stored as .npy/.json under one directory."""
+    def __init__(self, path):
+        self.path = path
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def load(self, params, model_name):
+        try:
+            with open(self._file('state.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        if meta.get('version') != STATE_VERSION or meta.get('params') != params or meta.get('model_name') != model_name:
+            return None
+        complaints = np.load(self._file('complaints.npz'))
+        tiles = np.load(self._file('tiles.npz'))
+        return {
+            'scaler': (np.array(meta['scaler_mean']), np.array(meta['scaler_scale'])),
+            'ids': complaints['ids'], 'text_hash': complaints['text_hash'], 'latlon': complaints['latlon'],
+            'embeddings': np.load(self._file('embeddings.npy')),
+            'tiles': tiles
+        }
+
+    def cached_tiles(self, state):
+        """tile_key -> (core member ids, halo member ids, labels, core mask) from a loaded state."""
+        tiles = state['tiles']
+        cached = {}
+        start = 0
+        for key, n_core, n_halo in zip(tiles['keys'].tolist(), tiles['core_counts'].tolist(),
+                                       tiles['halo_counts'].tolist()):
+            end = start + n_core + n_halo
+            members = tiles['members'][start:end]
+            cached[key] = (members[:n_core], members[n_core:], tiles['labels'][start:end], tiles['core'][start:end])
+            start = end
+        return cached
+
+    def save(self, params, model_name, scaler, ids, text_hash, latlon, embeddings, partitions, tile_results):
+        os.makedirs(self.path, exist_ok=True)
+        tile_keys = list(partitions)
+        # Per tile, core member ids then halo member ids, aligned with that tile's labels
+        members = [ids[np.concatenate(partitions[t])] for t in tile_keys]
+        np.savez(self._file('tiles.npz.tmp.npz'),
+                 keys=np.array(tile_keys, dtype=np.int64),
+                 core_counts=np.array([len(partitions[t][0]) for t in tile_keys], dtype=np.int64),
+                 halo_counts=np.array([len(partitions[t][1]) for t in tile_keys], dtype=np.int64),
+                 members=np.concatenate(members) if members else np.zeros(0, dtype=np.int64),
+                 labels=np.concatenate([tile_results[t][0] for t in tile_keys]) if members else np.zeros(0, np.int32),
+                 core=np.concatenate([tile_results[t][1] for t in tile_keys]) if members else np.zeros(0, bool))
+        np.savez(self._file('complaints.npz.tmp.npz'), ids=ids, text_hash=text_hash, latlon=latlon)
+        np.save(self._file('embeddings.npy.tmp.npy'), embeddings)
+        for name in ('tiles.npz', 'complaints.npz'):
+            os.replace(self._file(f'{name}.tmp.npz'), self._file(name))
+        os.replace(self._file('embeddings.npy.tmp.npy'), self._file('embeddings.npy'))
+        meta = {
+            'version': STATE_VERSION, 'params': params, 'model_name': model_name,
+            'scaler_mean': scaler[0].tolist(), 'scaler_scale': scaler[1].tolist(),
+            'saved_at': datetime.utcnow().isoformat()
+        }
+        with open(self._file('state.json.tmp'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(self._file('state.json.tmp'), self._file('state.json'))
+
+
+def build_complaint_groups(df, labels):
+    """Same group layout as ComplaintDBSCANClustering.assign_groups_to_df in the notebook."""
+    df = df.assign(cluster_id=labels)
+    complaint_groups = {}
+    counter = 1
+    for cluster_id, group_df in df[df['cluster_id'] >= 0].groupby('cluster_id', sort=True):
+        group_id = f"G{str(counter).zfill(3)}"
+        counter += 1
+        complaints_list = group_df.to_dict('records')
+        complaint_groups[group_id] = {
+            'group_id': group_id,
+            'priority': len(complaints_list),
+            'complaints': complaints_list,
+            'center_latitude': np.mean(group_df['latitude'].values),
+            'center_longitude': np.mean(group_df['longitude'].values),
+            'category': complaints_list[0]['category']
+        }
+    return complaint_groups
+
+
+def rebuild(df, clusterer=None, encoder=None, model_name=DEFAULT_MODEL_NAME, state_path=None, full=False):
+    """
+    Clusters a DataFrame with columns complaint_id, complaint, latitude, longitude, category.
+    Returns (complaint_groups, stats). `encoder` needs an encode(list_of_texts) method; a
+    cached SentenceTransformer(model_name) is loaded only if something actually needs encoding.
+    """
+    started = time.perf_counter()
+    clusterer = clusterer or TiledDBSCAN()
+    params = clusterer.params()
+    df = df.dropna(subset=['latitude', 'longitude']).sort_values('complaint_id').reset_index(drop=True)
+    ids = df['complaint_id'].to_numpy(dtype=np.int64)
+    latlon = df[['latitude', 'longitude']].to_numpy(dtype=np.float64)
+    text_hash = _text_hashes(df['complaint'].tolist())
+
+    store = ClusterState(state_path) if state_path else None
+    state = store.load(params, model_name) if store and not full else None
+
+    # Reuse embeddings of complaints whose text didn't change; encode the rest in one batch
+    embeddings = None
+    unchanged = np.zeros(len(ids), dtype=bool)
+    if state is not None and len(state['ids']):
+        pos = np.clip(np.searchsorted(state['ids'], ids), 0, len(state['ids']) - 1)
+        same_text = (state['ids'][pos] == ids) & (state['text_hash'][pos] == text_hash)
+        unchanged = same_text & np.all(state['latlon'][pos] == latlon, axis=1)
+        if same_text.any():
+            embeddings = np.zeros((len(ids), state['embeddings'].shape[1]), dtype=np.float32)
+            embeddings[same_text] = state['embeddings'][pos[same_text]]
+        to_encode = np.flatnonzero(~same_text)
+    else:
+        to_encode = np.arange(len(ids))
+    if len(to_encode):
+        if encoder is None:
+            from embedding_cache import cached_sentence_model
+            encoder = cached_sentence_model(model_name)
+        encoded = np.asarray(encoder.encode(df['complaint'].iloc[to_encode].tolist()), dtype=np.float32)
+        if embeddings is None:
+            embeddings = np.zeros((len(ids), encoded.shape[1]), dtype=np.float32)
+        embeddings[to_encode] = encoded
+    if embeddings is None:
+        embeddings = np.zeros((0, 0), dtype=np.float32)
+
+    # Incremental runs keep the saved scaler so cached tile labels stay comparable; --full refits it
+    if state is not None:
+        scaler = state['scaler']
+    elif len(ids):
+        scaler = clusterer.fit_scaler(latlon)
+    else:
+        scaler = (np.zeros(2), np.ones(2))
+    partitions = {}
+    features = embeddings
+    if len(ids):
+        features = np.hstack((embeddings, ((latlon - scaler[0]) / scaler[1]).astype(np.float32)))
+        partitions = clusterer.partition(latlon, scaler[1])
+
+    # A tile's cached labels are still valid if it has exactly the same, unchanged members
+    tile_results = {}
+    if state is not None:
+        cached = store.cached_tiles(state)
+        for tile, (core, halo) in partitions.items():
+            if tile not in cached:
+                continue
+            old_core, old_halo, labels, core_mask = cached[tile]
+            if (np.array_equal(old_core, ids[core]) and np.array_equal(old_halo, ids[halo])
+                    and unchanged[core].all() and unchanged[halo].all()):
+                tile_results[tile] = (labels, core_mask)
+    dirty = [tile for tile in partitions if tile not in tile_results]
+    tile_results.update(clusterer.cluster_tiles(features, partitions, dirty))
+
+    labels = clusterer.stitch(len(ids), partitions, tile_results)
+    complaint_groups = build_complaint_groups(df, labels)
+
+    if store:
+        store.save(params, model_name, scaler, ids, text_hash, latlon, embeddings, partitions, tile_results)
+    stats = {
+        'complaints': int(len(ids)),
+        'encoded': int(len(to_encode)),
+        'tiles': len(partitions),
+        'reclustered_tiles': len(dirty),
+        'groups': len(complaint_groups),
+        'noise': int((labels < 0).sum()),
+        'seconds': time.perf_counter() - started
+    }
+    return complaint_groups, stats
+
+
+def load_complaints(database_url):
+    """Reads the Complaint table into the notebook's column names."""
+    import pandas as pd
+    from sqlalchemy import create_engine
+    engine = create_engine(database_url)
+    query = ("SELECT id AS complaint_id, text AS complaint, gps_lat AS latitude, gps_lon AS longitude, category "
+             "FROM complaint WHERE gps_lat IS NOT NULL AND gps_lon IS NOT NULL")
+    with engine.connect() as conn:
+        return pd.read_sql_query(query, conn)
+
+
+def save_model_package(complaint_groups, path, config):
+    """Writes the pickle the realtime processor loads, atomically."""
+    package = {
+        'complaint_groups': complaint_groups,
+        'config': config,
+        'created_at': datetime.now(),
+        'total_groups': len(complaint_groups),
+        'total_complaints': sum(len(g['complaints']) for g in complaint_groups.values())
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.model_package_', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(package, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+if __name__ == "__main__":
+    base_dir = os.path.abspath(os.path.dirname(__file__))
+    parser = argparse.ArgumentParser(description="Rebuild complaint groups with tiled, incremental DBSCAN")
+    parser.add_argument('--database', default=os.getenv(
+        "DATABASE_URL", 'sqlite:///' + os.path.join(base_dir, 'instance', 'hackathon.db')))
+    parser.add_argument('--output', default=os.path.join(base_dir, 'complaint_clustering_model.pkl'))
+    parser.add_argument('--store', help="also write a memory-mapped GroupStore directory (see group_store.py)")
+    parser.add_argument('--state', help="directory for embeddings and tile labels reused by the next run")
+    parser.add_argument('--full', action='store_true', help="ignore the saved state and recluster everything")
+    parser.add_argument('--eps', type=float, default=0.5)
+    parser.add_argument('--min-samples', type=int, default=3)
+    parser.add_argument('--tile-level', type=int, default=3, help="tiles are 500 m * 2**level wide")
+    parser.add_argument('--gps-unit-meters', type=float, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--model', default=DEFAULT_MODEL_NAME)
+    args = parser.parse_args()
+
+    clusterer = TiledDBSCAN(args.eps, args.min_samples, args.tile_level,
+                            gps_unit_meters=args.gps_unit_meters, workers=args.workers)
+    complaint_groups, stats = rebuild(load_complaints(args.database), clusterer, model_name=args.model,
+                                      state_path=args.state, full=args.full)
+    config = dict(clusterer.params(), model_name=args.model)
+    save_model_package(complaint_groups, args.output, config)
+    print(f"✅ {stats['groups']} groups from {stats['complaints']} complaints "
+          f"({stats['reclustered_tiles']}/{stats['tiles']} tiles reclustered, {stats['encoded']} encoded) "
+          f"in {stats['seconds']:.1f}s -> {args.output}")
+    if args.store:
+        from group_store import convert_model_package
+        encoder = None
+        if os.getenv("GROUP_STORE_EMBEDDINGS", "1") == "1":
+            from embedding_cache import cached_sentence_model
+            encoder = cached_sentence_model(args.model)
+        convert_model_package(args.output, args.store, encoder, args.model if encoder else None)
+        print(f"✅ GroupStore written to {args.store}")
@@ -0,0 +1,149 @@
+# dedup.py
+#
+# Ingestion-time near-duplicate detection for complaints.
+# Each complaint text gets a MinHash signature over word unigrams+bigrams. Signatures are
+# split into LSH bands and bucketed per red-zone grid cell, so only complaints from the same
+# ~500 m cell and the same time window are ever compared. Entries older than the window are
+# evicted in arrival order, keeping memory proportional to recent traffic.
+
+import zlib
+from collections import deque
+
+import numpy as np
+
+from ai_module import clean_text
+from red_zone_processor import RedZoneDetector
+
+_MERSENNE_61 = (1 << 61) - 1
+
+
+class NearDuplicateIndex:
+    def __init__(self, num_perm=64, bands=16, threshold=0.7, window_seconds=24 * 3600,
+                 grid_size_meters=500, seed=1):
+        """
+        Args:
+            num_perm (int): MinHash signature length; must be divisible by `bands`.
+            bands (int): LSH bands; more bands find lower-similarity pairs.
+            threshold (float): Minimum estimated Jaccard similarity to call two texts duplicates.
+            window_seconds (int): Only complaints this recent can absorb a new one.
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self.grid = RedZoneDetector(grid_size_meters)
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 29, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_61, size=num_perm, dtype=np.uint64)
+
+        self._buckets = {}      # (cell, band, band_hash) -> set of keys
+        self._entries = {}      # key -> (signature, bucket keys, timestamp)
+        self._arrivals = deque()  # (timestamp, key) in arrival order
+
+    @staticmethod
+    def _tokens(text):
+        words = clean_text(text).split()
+        shingles = set(words)
+        shingles.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+        return shingles
+
+    def signature(self, text):
+        tokens = self._tokens(text)
+        if not tokens:
+            return None
+        hashes = np.fromiter((zlib.crc32(t.encode("utf-8")) for t in tokens), dtype=np.uint64, count=len(tokens))
+        permuted = (hashes[:, None] * self._a + self._b) % _MERSENNE_61
+        return (permuted.min(axis=0) & 0xFFFFFFFF).astype(np.uint32)
+
+    def _bucket_keys(self, cell, signature):
+        return [
+            (cell, band, hash(signature[band * self.rows:(band + 1) * self.rows].tobytes()))
+            for band in range(self.bands)
+        ]
+
+    def _expire(self, now):
+        while self._arrivals and now - self._arrivals[0][0] > self.window_seconds:
+            timestamp, key = self._arrivals.popleft()
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] == timestamp:
+                self.remove(key)
+
+    def find(self, text, lat, lon, timestamp):
+        """
+        Returns (key, similarity) of the best recent near-duplicate in the same grid cell,
+        or (None, 0.0). `timestamp` is epoch seconds.
+        """
+        self._expire(timestamp)
+        signature = self.signature(text)
+        if signature is None:
+            return None, 0.0
+        cell = self.grid._get_grid_id(lat, lon)
+
+        candidates = set()
+        for bucket in self._bucket_keys(cell, signature):
+            candidates.update(self._buckets.get(bucket, ()))
+
+        best_key, best_similarity = None, 0.0
+        for key in candidates:
+            other, _, other_ts = self._entries[key]
+            if timestamp - other_ts > self.window_seconds:
+                continue
+            similarity = float(np.mean(other == signature))
+            if similarity > best_similarity:
+                best_key, best_similarity = key, similarity
+        if best_similarity >= self.threshold:
+            return best_key, best_similarity
+        return None, best_similarity
+
+    def add(self, key, text, lat, lon, timestamp):
+        signature = self.signature(text)
+        if signature is None:
+            return
+        self.remove(key)
+        buckets = self._bucket_keys(self.grid._get_grid_id(lat, lon), signature)
+        for bucket in buckets:
+            self._buckets.setdefault(bucket, set()).add(key)
+        self._entries[key] = (signature, buckets, timestamp)
+        self._arrivals.append((timestamp, key))
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for bucket in entry[1]:
+            members = self._buckets.get(bucket)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._buckets[bucket]
+
+    def rekey(self, old_key, new_key):
+        """
+        Renames an entry, e.g. from a provisional key to the database id assigned on insert.
+        """
+        entry = self._entries.pop(old_key, None)
+        if entry is None:
+            return
+        for bucket in entry[1]:
+            members = self._buckets[bucket]
+            members.discard(old_key)
+            members.add(new_key)
+        self._entries[new_key] = entry
+        self._arrivals.append((entry[2], new_key))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def memory_bytes(self):
+        """
+        Approximate footprint: signatures plus one bucket reference per band per entry.
+        """
+        per_entry = self.num_perm * 4 + self.bands * 8
+        return len(self._entries) * per_entry + len(self._buckets) * 64
@@ -0,0 +1,215 @@
+# embedding_cache.py
+#
+# Content-keyed cache in front of SentenceTransformer.encode.
+# Complaint texts repeat a lot ("Power cut in my area"), so embeddings are looked up by a hash of
+# (model name, normalized text): first in an in-process LRU, then in an optional SQLite file that
+# every worker and the nightly cluster_rebuild.py job share. Only texts missing from both tiers
+# reach the transformer. CachedEncoder.encode() keeps the SentenceTransformer call shape:
+#
+#     encoder = CachedEncoder(SentenceTransformer(name), name, disk_path='instance/embedding_cache.sqlite3')
+#     processor = RealtimeDBSCANProcessor(encoder, complaint_groups)
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+_WHITESPACE = re.compile(r'\s+')
+
+# Largest number of keys per "WHERE key IN (...)" lookup, below SQLite's bound-parameter limit.
+_SQL_CHUNK = 500
+
+# encode() keyword arguments that don't change the vectors; all others become part of the cache key.
+_OUTPUT_NEUTRAL_KWARGS = frozenset({'show_progress_bar', 'batch_size', 'device', 'convert_to_numpy'})
+
+# Connections inherited across fork() are never used or closed (closing would checkpoint the WAL
+# from the child); they are only kept referenced here.
+_inherited_connections = []
+
+
+def normalize_text(text: str) -> str:
+    """
+    NFKC, case-folded, whitespace-collapsed text. all-MiniLM-L6-v2 is uncased and splits on
+    whitespace, so texts that normalize the same get the same embedding. Pass
+    normalize=str.strip to CachedEncoder for a case-sensitive model.
+    """
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', text).casefold()).strip()
+
+
+class CachedEncoder:
+    def __init__(self, model, model_name: str, max_entries: int = 10000, disk_path: str = None,
+                 max_disk_entries: int = None, normalize=normalize_text):
+        """
+        Args:
+            model: Anything with a SentenceTransformer-style encode(list_of_texts) method.
+            model_name (str): Part of every cache key, so two models never share embeddings.
+            max_entries (int): Size of the in-process LRU tier.
+            disk_path (str): SQLite file for the shared tier; None keeps the cache in-process only.
+                Each process opens its own connection on first use, so an encoder built in a
+                preloading master is safe to use from forked workers.
+            max_disk_entries (int): Oldest rows are dropped beyond this; None means unbounded.
+        """
+        self.model = model
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.normalize = normalize
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'disk_evictions': 0}
+
+        self.disk_path = disk_path
+        self._db = None
+        self._db_pid = None
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+
+    def _connection(self):
+        """This process's SQLite connection, opened on first use (call with self._lock held)."""
+        if not self.disk_path:
+            return None
+        if self._db is not None and self._db_pid != os.getpid():
+            _inherited_connections.append(self._db)
+            self._db = None
+        if self._db is None:
+            self._db = sqlite3.connect(self.disk_path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._db_pid = os.getpid()
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS embedding (key BLOB PRIMARY KEY, vector BLOB NOT NULL)")
+        return self._db
+
+    def _key(self, normalized: str, options: str = "") -> bytes:
+        # Without output-changing options the key is the same as before they were supported
+        prefix = f"{self.model_name}\0{options}" if options else self.model_name
+        return hashlib.sha1(f"{prefix}\0{normalized}".encode('utf-8')).digest()
+
+    def _remember(self, key, vector):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _disk_get(self, db, keys):
+        found = {}
+        for i in range(0, len(keys), _SQL_CHUNK):
+            chunk = keys[i:i + _SQL_CHUNK]
+            rows = db.execute(
+                f"SELECT key, vector FROM embedding WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for key, blob in rows:
+                found[bytes(key)] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def _disk_put(self, db, items):
+        db.execute("BEGIN")
+        try:
+            db.executemany("INSERT OR IGNORE INTO embedding (key, vector) VALUES (?, ?)",
+                                 [(key, vector.tobytes()) for key, vector in items])
+            if self.max_disk_entries:
+                cursor = db.execute(
+                    "DELETE FROM embedding WHERE rowid <= (SELECT MAX(rowid) FROM embedding) - ?",
+                    (self.max_disk_entries,)
+                )
+                self.stats['disk_evictions'] += max(cursor.rowcount, 0)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def encode(self, texts, **kwargs) -> np.ndarray:
+        """
+        Drop-in for SentenceTransformer.encode; repeated texts (also within one call) are encoded once.
+        Extra keyword arguments are passed to the model on a miss; those that change the output
+        (normalize_embeddings, precision, ...) are part of the cache key.
+        """
+        if isinstance(texts, str):
+            return self.encode([texts], **kwargs)[0]
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        options = repr(sorted((k, v) for k, v in kwargs.items() if k not in _OUTPUT_NEUTRAL_KWARGS))
+        options = "" if options == "[]" else options
+        normalized = [self.normalize(text) for text in texts]
+        keys = [self._key(n, options) for n in normalized]
+        vectors = {}
+        with self._lock:
+            for key in keys:
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    vectors[key] = vector
+            self.stats['hits'] += sum(1 for key in keys if key in vectors)
+
+        missing = list(dict.fromkeys(key for key in keys if key not in vectors))
+        if missing and self.disk_path:
+            with self._lock:
+                try:
+                    found = self._disk_get(self._connection(), missing)
+                except sqlite3.Error as e:
+                    print("⚠️ Embedding cache read failed:", e)
+                    found = {}
+                for key, vector in found.items():
+                    self._remember(key, vector)
+                self.stats['disk_hits'] += sum(1 for key in keys if key in found)
+            vectors.update(found)
+            missing = [key for key in missing if key not in found]
+
+        if missing:
+            missing = set(missing)
+            to_encode = {key: n for key, n in zip(keys, normalized) if key in missing}
+            encoded = np.asarray(self.model.encode(list(to_encode.values()), **kwargs), dtype=np.float32)
+            new_items = list(zip(to_encode, encoded))
+            with self._lock:
+                # Repeats of a missing text within this call are served by its one encode
+                self.stats['misses'] += len(to_encode)
+                self.stats['hits'] += sum(1 for key in keys if key in to_encode) - len(to_encode)
+                for key, vector in new_items:
+                    self._remember(key, vector)
+                if self.disk_path:
+                    try:
+                        self._disk_put(self._connection(), new_items)
+                    except sqlite3.Error as e:
+                        print("⚠️ Embedding cache write failed:", e)
+            vectors.update(new_items)
+
+        return np.vstack([vectors[key] for key in keys])
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['disk_hits'] + self.stats['misses']
+            return dict(
+                self.stats,
+                entries=len(self._lru),
+                hit_rate=round((self.stats['hits'] + self.stats['disk_hits']) / lookups, 4) if lookups else None
+            )
+
+    def close(self):
+        if self._db is not None and self._db_pid == os.getpid():
+            self._db.close()
+            self._db = None
+
+
+def cached_sentence_model(model_name: str) -> CachedEncoder:
+    """
+    SentenceTransformer(model_name) behind a CachedEncoder configured from the environment:
+    EMBEDDING_CACHE_ENTRIES (LRU size), EMBEDDING_CACHE_PATH (shared SQLite file; empty disables it)
+    and EMBEDDING_CACHE_MAX_ROWS.
+    """
+    from sentence_transformers import SentenceTransformer
+    max_rows = os.getenv("EMBEDDING_CACHE_MAX_ROWS")
+    return CachedEncoder(
+        SentenceTransformer(model_name), model_name,
+        max_entries=int(os.getenv("EMBEDDING_CACHE_ENTRIES", "10000")),
+        disk_path=os.getenv("EMBEDDING_CACHE_PATH", os.path.join(BASE_DIR, "instance", "embedding_cache.sqlite3")) or None,
+        max_disk_entries=int(max_rows) if max_rows else None
+    )
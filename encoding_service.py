@@ -0,0 +1,150 @@
+# encoding_service.py
+#
+# In-process micro-batching front end for SentenceTransformer.encode.
+# Concurrent callers submit single texts; a dedicated worker thread collects them
+# into micro-batches and runs one encode call per batch. BatchingEncoder.encode()
+# keeps the SentenceTransformer call shape, so it can be passed anywhere a
+# sentence_model is expected (e.g. RealtimeDBSCANProcessor):
+#
+#     encoder = BatchingEncoder(SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2'))
+#     processor = RealtimeDBSCANProcessor(encoder, complaint_groups)
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+_STOP = object()
+
+
+class BatchingEncoder:
+    def __init__(self, model, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        """
+        Args:
+            model: Anything with a SentenceTransformer-style encode(list_of_texts) method.
+            max_batch_size (int): Upper bound on texts per encode call.
+            max_wait_ms (float): How long the worker waits for more requests after the first one arrives.
+        """
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.stats = {'requests': 0, 'batches': 0, 'encoded': 0}
+        self._closed = False
+        self._pid = None
+        self._start()
+
+    def _start(self):
+        # Threads don't survive fork(): a process that inherited this encoder (gunicorn --preload)
+        # gets a fresh queue, lock and worker on first use.
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._worker = threading.Thread(target=self._run, name='batching-encoder', daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str, **kwargs) -> Future:
+        """
+        Queues one text and returns a Future resolving to its embedding (1-D float32 array).
+        Keyword arguments are passed to the model's encode; only requests with equal ones share a call.
+        """
+        future = Future()
+        if self._pid != os.getpid():
+            self._start()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BatchingEncoder is closed")
+            self._queue.put((text, future, kwargs))
+        return future
+
+    def encode(self, texts, **kwargs) -> np.ndarray:
+        """
+        Drop-in for SentenceTransformer.encode on a list of texts; blocks until all are encoded.
+        Extra keyword arguments (normalize_embeddings, ...) are passed to the model.
+        """
+        if isinstance(texts, str):
+            return self.submit(texts, **kwargs).result()
+        futures = [self.submit(text, **kwargs) for text in texts]
+        if not futures:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack([future.result() for future in futures])
+
+    def metrics(self):
+        """Batching counters, plus the wrapped model's own metrics() (e.g. CachedEncoder's) if it has them."""
+        with self._lock:
+            batching = dict(self.stats)
+        inner = self.model.metrics() if hasattr(self.model, 'metrics') else {}
+        return dict(inner, batching=batching)
+
+    def close(self, timeout: float = None):
+        """
+        Stops the worker after the requests already queued have been served.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._worker.join(timeout)
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        stop = False
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stop = True
+                break
+            batch.append(item)
+        return batch, stop
+
+    def _encode_batch(self, batch):
+        # One encode call per distinct set of keyword arguments, in arrival order
+        groups = {}
+        for item in batch:
+            groups.setdefault(repr(sorted(item[2].items())), []).append(item)
+        for group in groups.values():
+            self._encode_group(group)
+
+    def _encode_group(self, batch):
+        # Bursts are often the same sentence many times over; encode each distinct text once.
+        kwargs = batch[0][2]
+        unique_texts = list(dict.fromkeys(text for text, _, _ in batch))
+        try:
+            embeddings = np.asarray(self.model.encode(unique_texts, **kwargs), dtype=np.float32)
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        row_of = {text: row for row, text in enumerate(unique_texts)}
+        for text, future, _ in batch:
+            future.set_result(embeddings[row_of[text]])
+        with self._lock:
+            self.stats['requests'] += len(batch)
+            self.stats['batches'] += 1
+            self.stats['encoded'] += len(unique_texts)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch, stop = self._collect(item)
+            self._encode_batch(batch)
+            if stop:
+                break
+        # Drain anything submitted after close() so no caller blocks forever.
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                item[1].set_exception(RuntimeError("BatchingEncoder is closed"))
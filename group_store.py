@@ -0,0 +1,276 @@
+# group_store.py
+#
+# Versioned, memory-mapped columnar storage for complaint groups.
+# Replaces pickle.load of complaint_clustering_model.pkl on the serving path: every column is a
+# plain .npy file opened with np.load(mmap_mode='r'), so opening a store costs a few file opens,
+# and all workers share the same pages through the OS page cache instead of each holding a copy.
+#
+# Layout of a store directory:
+#   manifest.json              format version, package metadata, category dictionary
+#   group_ids.npy              (G,)   group ids (int64 or fixed-width unicode)
+#   group_priority.npy         (G,)   int64
+#   group_center.npy           (G, 2) float64 center latitude / longitude
+#   group_category.npy         (G,)   int32 codes into manifest['categories']
+#   group_offsets.npy          (G+1,) int64 offsets into the complaint columns
+#   complaint_ids.npy          (C,)   int64
+#   complaint_latlon.npy       (C, 2) float64
+#   complaint_category.npy     (C,)   int32 codes into manifest['categories']
+#   complaint_cluster.npy      (C,)   int64, -1 when missing
+#   complaint_text.npy         (B,)   uint8 UTF-8 bytes of every complaint text back to back
+#   complaint_text_offsets.npy (C+1,) int64 offsets into complaint_text.npy
+#   group_embeddings.npy       (G, D) float32 representative-text embeddings (optional)
+#
+# Convert an existing pickle from the repo root:
+#   python group_store.py complaint_clustering_model.pkl complaint_groups [--encode-with MODEL_NAME]
+
+import argparse
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from collections.abc import MutableMapping, Sequence
+from datetime import datetime
+
+import numpy as np
+
+FORMAT_NAME = "complaint-groups"
+FORMAT_VERSION = 1
+
+
+class ComplaintColumns(Sequence):
+    """
+    Read-only list view of one group's complaints; each complaint dict is built on access,
+    so len() and complaints[0] never touch the rest of the group.
+    """
+    def __init__(self, store, start, stop):
+        self._store = store
+        self._start = start
+        self._stop = stop
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._store._complaint(self._start + i)
+
+
+class GroupStore(MutableMapping):
+    """
+    Dict-like view of a converted model package: group_id -> group dict with the same keys the
+    pickle had (group_id, priority, category, center_latitude, center_longitude, complaints).
+    Groups added or replaced at runtime live in an in-memory overlay; the files are never written.
+    """
+    def __init__(self, path, embedding_model=None):
+        self.path = path
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != FORMAT_NAME or self.manifest.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a {FORMAT_NAME} v{FORMAT_VERSION} store")
+
+        self.categories = self.manifest["categories"]
+        self._group_ids = self._column("group_ids")
+        self._priority = self._column("group_priority")
+        self._center = self._column("group_center")
+        self._category = self._column("group_category")
+        self._offsets = self._column("group_offsets")
+        self._complaint_ids = self._column("complaint_ids")
+        self._latlon = self._column("complaint_latlon")
+        self._complaint_category = self._column("complaint_category")
+        self._cluster = self._column("complaint_cluster")
+        self._text = self._column("complaint_text")
+        self._text_offsets = self._column("complaint_text_offsets")
+
+        # Stored embeddings are only usable with the model that produced them.
+        self._embeddings = None
+        stored_model = self.manifest.get("embedding_model")
+        if stored_model and (embedding_model is None or embedding_model == stored_model):
+            self._embeddings = self._column("group_embeddings")
+
+        self._rows = {group_id: row for row, group_id in enumerate(self._group_ids.tolist())}
+        self._overlay = {}
+        self._removed = set()
+
+    def _column(self, name):
+        return np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+
+    def _complaint(self, i):
+        text = bytes(self._text[self._text_offsets[i]:self._text_offsets[i + 1]]).decode("utf-8")
+        cluster_id = int(self._cluster[i])
+        return {
+            "complaint_id": int(self._complaint_ids[i]),
+            "complaint": text,
+            "latitude": float(self._latlon[i, 0]),
+            "longitude": float(self._latlon[i, 1]),
+            "category": self.categories[self._complaint_category[i]],
+            "cluster_id": cluster_id if cluster_id >= 0 else None
+        }
+
+    def _group(self, row):
+        return {
+            "group_id": self._group_ids[row].item(),
+            "priority": int(self._priority[row]),
+            "complaints": ComplaintColumns(self, int(self._offsets[row]), int(self._offsets[row + 1])),
+            "center_latitude": float(self._center[row, 0]),
+            "center_longitude": float(self._center[row, 1]),
+            "category": self.categories[self._category[row]]
+        }
+
+    def _base_row(self, group_id):
+        if group_id in self._overlay or group_id in self._removed:
+            return None
+        return self._rows.get(group_id)
+
+    def __getitem__(self, group_id):
+        if group_id in self._overlay:
+            return self._overlay[group_id]
+        row = self._base_row(group_id)
+        if row is None:
+            raise KeyError(group_id)
+        return self._group(row)
+
+    def __setitem__(self, group_id, group_data):
+        self._overlay[group_id] = group_data
+
+    def __delitem__(self, group_id):
+        if group_id in self._overlay:
+            del self._overlay[group_id]
+            if group_id in self._rows:
+                self._removed.add(group_id)
+        elif self._base_row(group_id) is not None:
+            self._removed.add(group_id)
+        else:
+            raise KeyError(group_id)
+
+    def __iter__(self):
+        for group_id in self._rows:
+            if self._base_row(group_id) is not None:
+                yield group_id
+        yield from self._overlay
+
+    def __len__(self):
+        return len(self._rows) - len(self._removed | (self._overlay.keys() & self._rows.keys())) + len(self._overlay)
+
+    def __contains__(self, group_id):
+        return group_id in self._overlay or self._base_row(group_id) is not None
+
+    def stored_embeddings(self, group_ids):
+        """
+        Returns (embeddings, missing): a float32 array aligned with group_ids filled from the
+        mmapped embeddings, and the positions that have none (runtime-added groups). When the store
+        has no embeddings for this model, returns (None, every position).
+        """
+        if self._embeddings is None:
+            return None, list(range(len(group_ids)))
+        rows = [self._base_row(group_id) for group_id in group_ids]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        found = [i for i, row in enumerate(rows) if row is not None]
+        embeddings = np.zeros((len(group_ids), self._embeddings.shape[1]), dtype=np.float32)
+        if found:
+            embeddings[found] = self._embeddings[[rows[i] for i in found]]
+        return embeddings, missing
+
+
+def _encode_categories(values, categories):
+    lookup = {c: i for i, c in enumerate(categories)}
+    return np.array([lookup[v] for v in values], dtype=np.int32)
+
+
+def convert_model_package(package_path, store_path, sentence_model=None, embedding_model=None):
+    """
+    Converts a pickled model package (a dict with 'complaint_groups') into a GroupStore
+    directory, replacing any existing store at store_path. With a sentence_model, representative
+    embeddings are precomputed so workers skip the startup encode. Returns the group count.
+    """
+    with open(package_path, "rb") as f:
+        package = pickle.load(f)
+    groups = package["complaint_groups"]
+
+    group_ids = list(groups)
+    complaints = [c for group_id in group_ids for c in groups[group_id]["complaints"]]
+    categories = sorted({str(g.get("category", "")) for g in groups.values()} |
+                        {str(c.get("category", "")) for c in complaints})
+
+    offsets = np.zeros(len(group_ids) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(groups[group_id]["complaints"]) for group_id in group_ids])
+    texts = [str(c.get("complaint", "")).encode("utf-8") for c in complaints]
+    text_offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    text_offsets[1:] = np.cumsum([len(t) for t in texts])
+
+    if len({type(group_id) for group_id in group_ids}) > 1:
+        raise ValueError("Group ids must be all integers or all strings")
+    columns = {
+        "group_ids": np.asarray(group_ids) if group_ids else np.zeros(0, dtype=np.int64),
+        "group_priority": np.array([groups[g].get("priority", 0) for g in group_ids], dtype=np.int64),
+        "group_center": np.array([[groups[g]["center_latitude"], groups[g]["center_longitude"]] for g in group_ids],
+                                 dtype=np.float64).reshape(-1, 2),
+        "group_category": _encode_categories([str(groups[g].get("category", "")) for g in group_ids], categories),
+        "group_offsets": offsets,
+        "complaint_ids": np.array([c.get("complaint_id", -1) for c in complaints], dtype=np.int64),
+        "complaint_latlon": np.array([[c["latitude"], c["longitude"]] for c in complaints],
+                                     dtype=np.float64).reshape(-1, 2),
+        "complaint_category": _encode_categories([str(c.get("category", "")) for c in complaints], categories),
+        "complaint_cluster": np.array([c.get("cluster_id") if c.get("cluster_id") is not None else -1
+                                       for c in complaints], dtype=np.int64),
+        "complaint_text": np.frombuffer(b"".join(texts), dtype=np.uint8),
+        "complaint_text_offsets": text_offsets,
+    }
+    if columns["group_ids"].dtype.kind not in "iU":
+        raise ValueError("Group ids must be integers or strings")
+    if sentence_model is not None:
+        representatives = [groups[g]["complaints"][0]["complaint"] for g in group_ids]
+        columns["group_embeddings"] = np.asarray(sentence_model.encode(representatives), dtype=np.float32)
+
+    manifest = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "converted_at": datetime.utcnow().isoformat(),
+        "source_created_at": str(package.get("created_at")) if package.get("created_at") is not None else None,
+        "config": package.get("config"),
+        "total_groups": len(group_ids),
+        "total_complaints": len(complaints),
+        "categories": categories,
+        "embedding_model": embedding_model if sentence_model is not None else None
+    }
+
+    # Build next to the target and swap it in, so readers never see a half-written store.
+    parent = os.path.dirname(os.path.abspath(store_path))
+    tmp_path = tempfile.mkdtemp(dir=parent, prefix=".group_store_")
+    try:
+        for name, column in columns.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), column, allow_pickle=False)
+        with open(os.path.join(tmp_path, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, default=str)
+        old_path = None
+        if os.path.exists(store_path):
+            old_path = tempfile.mkdtemp(dir=parent, prefix=".group_store_old_")
+            os.replace(store_path, os.path.join(old_path, "store"))
+        os.replace(tmp_path, store_path)
+        if old_path:
+            shutil.rmtree(old_path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    return len(group_ids)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a pickled complaint model package to a GroupStore")
+    parser.add_argument("package", help="e.g. complaint_clustering_model.pkl")
+    parser.add_argument("store", help="output directory, e.g. complaint_groups")
+    parser.add_argument("--encode-with", metavar="MODEL_NAME",
+                        help="SentenceTransformer model used to precompute representative embeddings")
+    args = parser.parse_args()
+
+    model = None
+    if args.encode_with:
+        from embedding_cache import cached_sentence_model
+        model = cached_sentence_model(args.encode_with)
+    count = convert_model_package(args.package, args.store, model, args.encode_with)
+    print(f"✅ Wrote {count} groups to {args.store}")
@@ -0,0 +1,138 @@
+# media_store.py
+#
+# Content-addressed storage for complaint photos/videos.
+# Uploads are copied to disk in fixed-size chunks while their SHA-256 is computed and
+# stored as <sha256><ext>, so re-uploaded identical media is kept once and files with the
+# same original name no longer overwrite each other. Thumbnail/poster generation runs on
+# a background worker pool after the request has returned.
+
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import send_from_directory
+from werkzeug.utils import secure_filename
+
+try:
+    from PIL import Image
+except ImportError:  # optional: photo thumbnails are skipped without Pillow
+    Image = None
+
+CHUNK_SIZE = 1 << 20  # 1 MB
+CONTENT_ADDRESSED_NAME = re.compile(r"^([0-9a-f]{64})(\.[A-Za-z0-9]{1,9})?$")
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+LEGACY_MAX_AGE = 300
+
+
+class MediaStore:
+    def __init__(self, root, chunk_size=CHUNK_SIZE):
+        self.root = root
+        self.chunk_size = chunk_size
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def _extension(filename):
+        ext = os.path.splitext(secure_filename(filename or ""))[1].lower()
+        return ext if ext[1:].isalnum() and len(ext) <= 10 else ""
+
+    def path(self, filename):
+        return os.path.join(self.root, filename)
+
+    def save(self, file_storage):
+        """
+        Streams an uploaded file to disk while hashing it.
+        Returns (filename, is_new); is_new is False when identical content was already stored.
+        """
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".upload_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                stream = file_storage.stream
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+
+            filename = digest.hexdigest() + self._extension(file_storage.filename)
+            final_path = self.path(filename)
+            if os.path.exists(final_path):
+                os.remove(tmp_path)
+                return filename, False
+            os.replace(tmp_path, final_path)
+            return filename, True
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def make_photo_thumbnail(path, size=(320, 320)):
+    if Image is None:
+        return None
+    thumb_path = os.path.splitext(path)[0] + ".thumb.jpg"
+    if os.path.exists(thumb_path):
+        return thumb_path
+    with Image.open(path) as img:
+        img.thumbnail(size)
+        img.convert("RGB").save(thumb_path, "JPEG", quality=80)
+    return thumb_path
+
+
+def make_video_poster(path):
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return None
+    poster_path = os.path.splitext(path)[0] + ".poster.jpg"
+    if os.path.exists(poster_path):
+        return poster_path
+    subprocess.run(
+        [ffmpeg, "-y", "-loglevel", "error", "-ss", "1", "-i", path, "-frames:v", "1", "-vf", "scale=640:-2", poster_path],
+        check=True, timeout=120
+    )
+    return poster_path
+
+
+class MediaPostProcessor:
+    """
+    Background worker pool for derived media (thumbnails, posters).
+    Failures are logged and never reach the request that uploaded the file.
+    """
+    def __init__(self, max_workers=2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="media")
+
+    def _run(self, func, path):
+        try:
+            return func(path)
+        except Exception as e:
+            print(f"⚠️ Media post-processing failed for {path}:", e)
+            return None
+
+    def submit(self, func, path):
+        return self._executor.submit(self._run, func, path)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def send_media(folder, filename):
+    """
+    Serves an uploaded file with HTTP Range support and conditional GET (304 / 206).
+    Content-addressed files (<sha256><ext>) can never change, so they get their hash as a
+    strong ETag and a one-year immutable Cache-Control; other files are revalidated often.
+    """
+    match = CONTENT_ADDRESSED_NAME.match(filename)
+    if match:
+        response = send_from_directory(folder, filename, conditional=True, etag=match.group(1),
+                                       max_age=IMMUTABLE_MAX_AGE)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+    else:
+        response = send_from_directory(folder, filename, conditional=True, max_age=LEGACY_MAX_AGE)
+    response.headers["Accept-Ranges"] = "bytes"
+    return response
@@ -5,11 +5,19 @@ import pickle
 from sentence_transformers import SentenceTransformer
 from sklearn.preprocessing import StandardScaler
 from datetime import datetime
+from ann_index import ExactIndex, SpatialPrefilter
+from priority_index import ALL, GroupPriorityIndex
 
 # --- 1. ComplaintDBSCANClustering Class ---
 # This class defines the structure of your clustered data for backend.
 # The backend will primarily use the 'complaint_groups' attribute from the loaded .pkl file.
 class ComplaintDBSCANClustering:
+    # Class-level defaults, so instances unpickled from older packages have them too
+    _priority_index = None
+    _indexed_groups = None
+    _indexed_size = 0
+    _shared_index = False
+
     def __init__(self, eps=0.5, min_samples=3, model_name='sentence-transformers/all-MiniLM-L6-v2'):
         self.eps = eps
         self.min_samples = min_samples
@@ -17,47 +25,190 @@ class ComplaintDBSCANClustering:
         self.complaint_groups = {}
         self.clusters = None
 
-    def get_high_priority_groups(self, min_priority=3):
-        high_priority = {
-            group_id: data for group_id, data in self.complaint_groups.items()
-            if data['priority'] >= min_priority
-        }
-        return high_priority
+    @property
+    def priority_index(self) -> GroupPriorityIndex:
+        """
+        Priority ordering of complaint_groups. An index assigned here (e.g. the one a
+        RealtimeDBSCANProcessor keeps current on the same group map) is used as is; otherwise one is
+        built lazily and rebuilt when complaint_groups is replaced or grows/shrinks in place.
+        In-place merges that keep the group count are only seen through a shared index.
+        """
+        if self._shared_index:
+            return self._priority_index
+        if self._indexed_groups is not self.complaint_groups or self._indexed_size != len(self.complaint_groups):
+            self._priority_index = GroupPriorityIndex(self.complaint_groups)
+            self._indexed_groups = self.complaint_groups
+            self._indexed_size = len(self.complaint_groups)
+        return self._priority_index
+
+    @priority_index.setter
+    def priority_index(self, index: GroupPriorityIndex):
+        self._priority_index = index
+        self._shared_index = index is not None
+
+    def get_high_priority_groups(self, min_priority=3, category=None, offset=0, limit=None):
+        """
+        Groups with priority >= min_priority, highest priority (then largest) first.
+        Served from the priority index, so only the returned page is touched.
+        """
+        index = self.priority_index
+        category = ALL if category is None else category
+        if limit is None:
+            limit = index.count(category, min_priority)
+        groups = {}
+        for entry in index.query(category, min_priority, offset, limit):
+            group_data = self.complaint_groups.get(entry['group_id'])
+            if group_data is not None:  # removed since it was indexed
+                groups[entry['group_id']] = group_data
+        return groups
 
 # --- 2. RealtimeDBSCANProcessor Class ---
 # This class is designed for processing a single new complaint in real-time.
+# Group representatives are encoded once (text embedding + scaled GPS) and kept in a
+# pluggable nearest-neighbour index (see ann_index.py), so each new complaint costs a
+# single encode plus one index lookup. An optional spatial prefilter restricts scoring
+# to groups whose center is within `spatial_radius_meters` of the complaint.
+# A GroupPriorityIndex is kept in step with every group change for dashboard queries.
 class RealtimeDBSCANProcessor:
-    def __init__(self, sentence_model: SentenceTransformer, complaint_groups: dict, eps_distance: float = 0.7):
+    def __init__(self, sentence_model: SentenceTransformer, complaint_groups: dict, eps_distance: float = 0.7,
+                 index=None, spatial_radius_meters: float = None, priority_index: GroupPriorityIndex = None):
         self.sentence_model = sentence_model
         self.complaint_groups = complaint_groups
         self.eps_distance = eps_distance
         self.scaler = StandardScaler()
+        self.index = index if index is not None else ExactIndex()
+        self.spatial_filter = SpatialPrefilter(spatial_radius_meters) if spatial_radius_meters else None
+        self.priority_index = priority_index if priority_index is not None else GroupPriorityIndex()
+        self.refresh()
+
+    @staticmethod
+    def _representative_text(group_data: dict) -> str:
+        return group_data['complaints'][0]['complaint']
+
+    def _encode(self, texts) -> np.ndarray:
+        return np.asarray(self.sentence_model.encode(list(texts)), dtype=np.float32)
+
+    def _scale_gps(self, coords) -> np.ndarray:
+        return self.scaler.transform(np.asarray(coords, dtype=np.float64).reshape(-1, 2)).astype(np.float32)
+
+    def _index_spatially(self, group_id, group_data: dict):
+        if self.spatial_filter is not None:
+            self.spatial_filter.add(group_id, group_data['center_latitude'], group_data['center_longitude'])
+
+    def refresh(self):
+        """
+        Rebuilds the index from self.complaint_groups in one batched encode.
+        The GPS scaler is fitted once on the group centers so GPS distances are comparable across groups.
+        """
+        if self.spatial_filter is not None:
+            self.spatial_filter.clear()
+        self.priority_index.rebuild(self.complaint_groups)
+        group_ids = list(self.complaint_groups.keys())
+        self._fitted = bool(group_ids)
+        if not group_ids:
+            self.index.build([], np.empty((0, 0), dtype=np.float32))
+            return
+
+        groups = [self.complaint_groups[group_id] for group_id in group_ids]
+        centers = np.array([[g['center_latitude'], g['center_longitude']] for g in groups], dtype=np.float64)
+        self.scaler.fit(centers)
+
+        embeddings = self._group_embeddings(group_ids, groups)
+        self.index.build(group_ids, np.hstack((embeddings, self._scale_gps(centers))))
+        for group_id, group_data in zip(group_ids, groups):
+            self._index_spatially(group_id, group_data)
+
+    def _group_embeddings(self, group_ids, groups) -> np.ndarray:
+        """
+        Representative-text embeddings for the given groups. A GroupStore (group_store.py) can
+        supply precomputed ones from its mmapped file; only the rest are encoded.
+        """
+        stored = getattr(self.complaint_groups, 'stored_embeddings', None)
+        if stored is None:
+            return self._encode(self._representative_text(g) for g in groups)
+        embeddings, missing = stored(group_ids)
+        if missing:
+            encoded = self._encode(self._representative_text(groups[i]) for i in missing)
+            if embeddings is None:
+                return encoded
+            embeddings[missing] = encoded
+        return embeddings
+
+    def _group_features(self, group_data: dict) -> np.ndarray:
+        embedding = self._encode([self._representative_text(group_data)])
+        gps = self._scale_gps([group_data['center_latitude'], group_data['center_longitude']])
+        return np.hstack((embedding, gps))[0]
+
+    def add_group(self, group_id, group_data: dict):
+        """
+        Registers a new group (or replaces an existing one) with an incremental index insert.
+        """
+        self.complaint_groups[group_id] = group_data
+        if not self._fitted:
+            self.refresh()
+            return
+        self.index.add(group_id, self._group_features(group_data))
+        self._index_spatially(group_id, group_data)
+        self.priority_index.upsert(group_id, group_data)
+
+    def merge_complaint(self, group_id, complaint: dict):
+        """
+        Appends a complaint to a group after process_new_complaint returned 'merged'. Priority follows
+        the notebook (number of complaints); the representative and center are left as they are,
+        so only the priority index moves, in O(log n).
+        """
+        group_data = dict(self.complaint_groups[group_id])
+        group_data['complaints'] = list(group_data['complaints']) + [complaint]
+        group_data['priority'] = len(group_data['complaints'])
+        self.complaint_groups[group_id] = group_data
+        self.priority_index.upsert(group_id, group_data)
+        return group_data
+
+    def get_high_priority_groups(self, min_priority=3, category=None, offset=0, limit=10):
+        """One page of {'group_id', 'priority', 'size', 'category'} rows, highest priority first."""
+        return self.priority_index.query(ALL if category is None else category, min_priority, offset, limit)
+
+    def update_group(self, group_id):
+        """
+        Re-computes the cached features for a group whose representative text or center changed.
+        """
+        self.add_group(group_id, self.complaint_groups[group_id])
+
+    def remove_group(self, group_id):
+        self.complaint_groups.pop(group_id, None)
+        self.index.remove(group_id)
+        self.priority_index.remove(group_id)
+        if self.spatial_filter is not None:
+            self.spatial_filter.remove(group_id)
+
+    def _encode_query(self, text: str, lat: float, lon: float) -> np.ndarray:
+        return np.hstack((self._encode([text]), self._scale_gps([lat, lon])))[0]
+
+    def _nearest_group(self, combined_new: np.ndarray, lat: float, lon: float):
+        candidates = None
+        if self.spatial_filter is not None:
+            candidates = self.spatial_filter.candidates(lat, lon)
+        found = self.index.search(combined_new, k=1, candidates=candidates)
+        if not found:
+            return None, float('inf')
+        return found[0]
 
     def process_new_complaint(self, new_complaint_text: str, new_lat: float, new_lon: float) -> dict:
         """
         Processes a new complaint to determine if it merges with an existing group or forms a new one.
         """
-        new_embedding = self.sentence_model.encode([new_complaint_text]).reshape(1, -1)
-        scaled_new_gps = self.scaler.fit_transform(np.array([[new_lat, new_lon]]))
-        combined_new = np.hstack((new_embedding, scaled_new_gps))
-        
-        min_distance = float('inf')
-        best_group_id = None
-        
-        for group_id, group_data in self.complaint_groups.items():
-            representative_complaint_text = group_data['complaints'][0]['complaint']
-            representative_embedding = self.sentence_model.encode([representative_complaint_text]).reshape(1, -1)
-            scaled_rep_gps = self.scaler.fit_transform(np.array([[group_data['center_latitude'], group_data['center_longitude']]]))
-            combined_rep = np.hstack((representative_embedding, scaled_rep_gps))
-            
-            distance = np.linalg.norm(combined_new - combined_rep)
-
-            if distance < min_distance:
-                min_distance = distance
-                best_group_id = group_id
+        if len(self.index) == 0:
+            return {
+                'action': 'new_group',
+                'distance': float('inf'),
+                'total_complaints': 1
+            }
+
+        combined_new = self._encode_query(new_complaint_text, new_lat, new_lon)
+        best_group_id, min_distance = self._nearest_group(combined_new, new_lat, new_lon)
         
         # After checking ALL groups, make the final decision
-        if min_distance <= self.eps_distance:
+        if best_group_id is not None and min_distance <= self.eps_distance:
             return {
                 'action': 'merged',
                 'group_id': best_group_id,
@@ -69,4 +220,4 @@ class RealtimeDBSCANProcessor:
                 'action': 'new_group',
                 'distance': min_distance,
                 'total_complaints': 1
-            }
\ No newline at end of file
+            }
@@ -0,0 +1,132 @@
+# model_registry.py
+#
+# Lazily loaded, process-wide shared models.
+# Heavy libraries (torch, transformers, sentence-transformers) are imported inside the
+# loaders, so importing this module (and app.py) stays cheap. Call preload() in the
+# master process before forking (e.g. `gunicorn --preload` with PRELOAD_MODELS set) so
+# workers inherit the loaded weights copy-on-write instead of each loading its own copy.
+
+import gc
+import os
+import pickle
+import threading
+import time
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+SENTENCE_MODEL_NAME = os.getenv("SENTENCE_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._lock = threading.RLock()
+        self.load_seconds = {}
+
+    def register(self, name, loader):
+        """
+        Registers a zero-argument loader; it runs at most once, on first get().
+        """
+        self._loaders[name] = loader
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._lock:
+            if name not in self._models:
+                start = time.perf_counter()
+                self._models[name] = self._loaders[name]()
+                self.load_seconds[name] = time.perf_counter() - start
+            return self._models[name]
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def preload(self, names=None):
+        """
+        Loads the given models (all registered ones by default) and freezes the GC heap so
+        forked workers don't dirty the shared pages when the collector runs.
+        """
+        for name in names or list(self._loaders):
+            self.get(name)
+        gc.freeze()
+
+    def status(self):
+        return {
+            name: {
+                'loaded': name in self._models,
+                'load_seconds': self.load_seconds.get(name)
+            }
+            for name in self._loaders
+        }
+
+
+def _load_sentence_model():
+    # Wrapped in the shared embedding cache, so repeated complaint texts skip the transformer
+    from embedding_cache import cached_sentence_model
+    model = cached_sentence_model(SENTENCE_MODEL_NAME)
+    if os.getenv("EMBEDDING_BATCHING", "0") == "1":
+        # Concurrent requests' texts are coalesced into one cache lookup / encode call
+        from encoding_service import BatchingEncoder
+        model = BatchingEncoder(
+            model,
+            max_batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "64")),
+            max_wait_ms=float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+        )
+    return model
+
+
+def _load_priority_predictor():
+    from priority_pridiction import PriorityPredictor
+    return PriorityPredictor(
+        os.getenv("PRIORITY_MODEL_PATH", os.path.join(BASE_DIR, "priority_prediction_model.pth")),
+        quantize=os.getenv("PRIORITY_MODEL_QUANTIZE", "0") == "1"
+    )
+
+
+def _load_complaint_groups():
+    # Prefer the memory-mapped store (see group_store.py); fall back to unpickling the package.
+    store_path = os.getenv("COMPLAINT_GROUPS_PATH", os.path.join(BASE_DIR, "complaint_groups"))
+    if os.path.exists(os.path.join(store_path, "manifest.json")):
+        from group_store import GroupStore
+        return GroupStore(store_path, embedding_model=SENTENCE_MODEL_NAME)
+    with open(os.path.join(BASE_DIR, "complaint_clustering_model.pkl"), "rb") as f:
+        model_package = pickle.load(f)
+    return model_package['complaint_groups']
+
+
+def _load_group_priority_index():
+    # Shared with the realtime processor, which keeps it current; dashboards read it without the model
+    from priority_index import GroupPriorityIndex
+    return GroupPriorityIndex(registry.get('complaint_groups'))
+
+
+def _group_index():
+    # GROUP_INDEX=exact|ivf|hnsw picks the group-merging index (see ann_index.py); hnsw needs hnswlib
+    from ann_index import ExactIndex, IVFIndex, HNSWIndex
+    kind = os.getenv("GROUP_INDEX", "exact")
+    if kind == "exact":
+        return ExactIndex()
+    if kind == "ivf":
+        return IVFIndex(nlist=int(os.getenv("GROUP_IVF_NLIST", "256")), nprobe=int(os.getenv("GROUP_IVF_NPROBE", "8")))
+    if kind == "hnsw":
+        return HNSWIndex(ef_search=int(os.getenv("GROUP_HNSW_EF_SEARCH", "64")))
+    raise ValueError(f"Unknown GROUP_INDEX {kind!r}; expected exact, ivf or hnsw")
+
+
+def _load_realtime_processor():
+    from ml_processor import RealtimeDBSCANProcessor
+    spatial_radius = os.getenv("GROUP_SPATIAL_RADIUS_M")
+    return RealtimeDBSCANProcessor(registry.get('sentence_model'), registry.get('complaint_groups'),
+                                   index=_group_index(),
+                                   spatial_radius_meters=float(spatial_radius) if spatial_radius else None,
+                                   priority_index=registry.get('group_priority_index'))
+
+
+registry = ModelRegistry()
+registry.register('sentence_model', _load_sentence_model)
+registry.register('priority_predictor', _load_priority_predictor)
+registry.register('complaint_groups', _load_complaint_groups)
+registry.register('group_priority_index', _load_group_priority_index)
+registry.register('realtime_processor', _load_realtime_processor)
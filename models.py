@@ -30,7 +30,11 @@ class OtpCode(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     phone = db.Column(db.String(15), unique=True, nullable=False)
     code = db.Column(db.String(10), nullable=False)
-    expires_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)      # wrong codes entered
+    locked_until = db.Column(db.DateTime, nullable=True)             # lockout after too many attempts
+    issue_count = db.Column(db.Integer, default=0, nullable=False)   # codes issued in the current window
+    issue_window_start = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def __repr__(self):
@@ -62,6 +66,15 @@ class Complaint(db.Model):
     status = db.Column(db.String(20), default="Pending")  # "Pending" / "Done"
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Composite indexes backing keyset pagination on (created_at, id) and its filters
+    __table_args__ = (
+        db.Index("ix_complaint_created_id", "created_at", "id"),
+        db.Index("ix_complaint_status_created_id", "status", "created_at", "id"),
+        db.Index("ix_complaint_category_created_id", "category", "created_at", "id"),
+        db.Index("ix_complaint_priority_created_id", "priority", "created_at", "id"),
+        db.Index("ix_complaint_lat_lon", "gps_lat", "gps_lon"),
+    )
+
     def __repr__(self):
         return f"<Complaint {self.id} {self.category} {self.priority} x{self.count}>"
 
@@ -0,0 +1,224 @@
+# otp_store.py
+#
+# OTP issuing/verification on the otp_code table, fronted by an in-memory TTL cache.
+# Codes never touch the hot `user` table. The cache answers expired/locked/wrong-code
+# checks without a database round trip; a successful check is confirmed with a single
+# conditional DELETE, so a code can be used once even across workers. Wrong attempts
+# are counted across reissued codes and lock the phone out for a while; only a successful
+# login or the end of the lockout clears them. Codes issued per phone are capped per window,
+# and expired rows are purged in bulk.
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+class OtpLocked(Exception):
+    def __init__(self, locked_until):
+        super().__init__(f"locked until {locked_until.isoformat()}")
+        self.locked_until = locked_until
+
+
+class OtpIssueLimited(Exception):
+    def __init__(self, retry_at):
+        super().__init__(f"too many codes issued; retry at {retry_at.isoformat()}")
+        self.retry_at = retry_at
+
+
+class OtpStore:
+    def __init__(self, db, model, ttl_seconds=300, max_attempts=5, lockout_seconds=900,
+                 max_issues=5, issue_window_seconds=900, purge_interval_seconds=60, max_cache_entries=100000):
+        self.db = db
+        self.model = model
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_attempts = max_attempts
+        self.lockout = timedelta(seconds=lockout_seconds)
+        self.max_issues = max_issues
+        self.issue_window = timedelta(seconds=issue_window_seconds)
+        self.purge_interval_seconds = purge_interval_seconds
+        self.max_cache_entries = max_cache_entries
+        self._cache = {}    # phone -> {'code', 'expires_at', 'attempts', 'locked_until'}
+        self._lock = threading.Lock()
+        self._last_purge = time.monotonic()
+
+    @staticmethod
+    def _entry(row):
+        return {
+            'code': row.code,
+            'expires_at': row.expires_at,
+            'attempts': row.attempts or 0,
+            'locked_until': row.locked_until
+        }
+
+    def _load(self, phone):
+        row = self.model.query.filter_by(phone=phone).first()
+        entry = self._entry(row) if row else None
+        with self._lock:
+            if entry:
+                self._cache[phone] = entry
+            else:
+                self._cache.pop(phone, None)
+        return entry
+
+    def _cached(self, phone):
+        with self._lock:
+            entry = self._cache.get(phone)
+        return entry if entry is not None else self._load(phone)
+
+    def locked_until(self, phone):
+        entry = self._cached(phone)
+        if entry and entry['locked_until'] and entry['locked_until'] > datetime.utcnow():
+            return entry['locked_until']
+        return None
+
+    def issue(self, phone, code):
+        """
+        Stores a fresh code for the phone and returns its expiry. Wrong attempts carry over from
+        the previous code. Raises OtpLocked during a lockout and OtpIssueLimited once max_issues
+        codes were issued in the current issue window.
+        """
+        self._maybe_purge()
+        locked_until = self.locked_until(phone)
+        if locked_until:
+            raise OtpLocked(locked_until)
+
+        now = datetime.utcnow()
+        expires_at = now + self.ttl
+        table = self.model.__table__
+        unlocked = self.db.or_(table.c.locked_until.is_(None), table.c.locked_until <= now)
+        new_window = self.db.or_(table.c.issue_window_start.is_(None),
+                                 table.c.issue_window_start <= now - self.issue_window)
+        lock_expired = self.db.and_(table.c.locked_until.isnot(None), table.c.locked_until <= now)
+        # One conditional UPDATE: the row (not this worker's cache) decides lockout and issue cap
+        row = self.db.session.execute(
+            table.update().where(
+                table.c.phone == phone, unlocked,
+                self.db.or_(new_window, self.db.func.coalesce(table.c.issue_count, 0) < self.max_issues)
+            ).values(
+                code=code,
+                expires_at=expires_at,
+                created_at=now,
+                issue_count=self.db.case((new_window, 1), else_=self.db.func.coalesce(table.c.issue_count, 0) + 1),
+                issue_window_start=self.db.case((new_window, now), else_=table.c.issue_window_start),
+                attempts=self.db.case((lock_expired, 0), else_=table.c.attempts),
+                locked_until=self.db.case((lock_expired, None), else_=table.c.locked_until)
+            ).returning(table.c.code, table.c.expires_at, table.c.attempts, table.c.locked_until)
+        ).first()
+        if row is None:
+            existing = self.model.query.filter_by(phone=phone).first()
+            if existing is not None:
+                self.db.session.rollback()
+                with self._lock:
+                    self._cache[phone] = self._entry(existing)
+                if existing.locked_until and existing.locked_until > now:
+                    raise OtpLocked(existing.locked_until)
+                raise OtpIssueLimited(existing.issue_window_start + self.issue_window)
+            row = self.model(phone=phone, code=code, expires_at=expires_at, attempts=0, created_at=now,
+                             issue_count=1, issue_window_start=now)
+            self.db.session.add(row)
+        self.db.session.commit()
+
+        with self._lock:
+            self._cache[phone] = self._entry(row)
+        return expires_at
+
+    def verify(self, phone, code):
+        """
+        Returns (ok, reason); reason is one of None, "missing", "expired", "locked", "invalid".
+        """
+        self._maybe_purge()
+        now = datetime.utcnow()
+        entry = self._cached(phone)
+        if entry is None:
+            return False, "missing"
+        if entry['locked_until'] and entry['locked_until'] > now:
+            return False, "locked"
+
+        if entry['code'] != code:
+            # Another worker may have issued a newer code; re-read before counting a failure.
+            entry = self._load(phone)
+            if entry is None:
+                return False, "missing"
+        if entry['expires_at'] < now:
+            return False, "expired"
+        if entry['code'] != code:
+            return self._record_failure(phone, now)
+
+        # The lockout is re-checked here too: this worker's cache may not have seen it yet.
+        table = self.model.__table__
+        result = self.db.session.execute(
+            table.delete().where(
+                table.c.phone == phone, table.c.code == code, table.c.expires_at >= now,
+                self.db.or_(table.c.locked_until.is_(None), table.c.locked_until < now)
+            )
+        )
+        self.db.session.commit()
+        if result.rowcount != 1:
+            entry = self._load(phone)
+            if entry and entry['locked_until'] and entry['locked_until'] > now:
+                return False, "locked"
+            return False, "invalid"
+        with self._lock:
+            self._cache.pop(phone, None)
+        return True, None
+
+    def _record_failure(self, phone, now):
+        # One atomic UPDATE, so concurrent wrong guesses on several workers all count.
+        # A lockout that has run out starts the count again.
+        table = self.model.__table__
+        lock_expired = self.db.and_(table.c.locked_until.isnot(None), table.c.locked_until <= now)
+        attempts = self.db.case((lock_expired, 1), else_=self.db.func.coalesce(table.c.attempts, 0) + 1)
+        row = self.db.session.execute(
+            table.update().where(table.c.phone == phone).values(
+                attempts=attempts,
+                locked_until=self.db.case(
+                    (table.c.locked_until > now, table.c.locked_until),
+                    (attempts >= self.max_attempts, now + self.lockout),
+                    else_=None
+                )
+            ).returning(table.c.code, table.c.expires_at, table.c.attempts, table.c.locked_until)
+        ).first()
+        self.db.session.commit()
+        if row is None:
+            return False, "missing"
+        with self._lock:
+            self._cache[phone] = self._entry(row)
+        if row.locked_until and row.locked_until > now:
+            return False, "locked"
+        return False, "invalid"
+
+    def _maybe_purge(self):
+        if time.monotonic() - self._last_purge < self.purge_interval_seconds:
+            return
+        self.purge()
+
+    def purge(self):
+        """
+        Bulk-deletes expired, unlocked rows whose issue window has passed (so neither the attempt
+        count nor the issue cap is reset early) and drops expired entries from the cache.
+        """
+        self._last_purge = time.monotonic()
+        now = datetime.utcnow()
+        table = self.model.__table__
+        result = self.db.session.execute(
+            table.delete().where(
+                table.c.expires_at < now,
+                self.db.or_(table.c.locked_until.is_(None), table.c.locked_until < now),
+                self.db.or_(table.c.issue_window_start.is_(None), table.c.issue_window_start < now - self.issue_window)
+            )
+        )
+        self.db.session.commit()
+
+        with self._lock:
+            stale = [
+                phone for phone, entry in self._cache.items()
+                if entry['expires_at'] < now and not (entry['locked_until'] and entry['locked_until'] > now)
+            ]
+            for phone in stale:
+                del self._cache[phone]
+            if len(self._cache) > self.max_cache_entries:
+                # Entries are re-read from the table on demand, so dropping the soonest-expiring is safe.
+                for phone, _ in sorted(self._cache.items(), key=lambda item: item[1]['expires_at'])[
+                        :len(self._cache) - self.max_cache_entries]:
+                    del self._cache[phone]
+        return result.rowcount
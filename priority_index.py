@@ -0,0 +1,123 @@
+# priority_index.py
+#
+# Maintained ordering of complaint groups for "worst issues first" dashboards.
+# Groups are kept sorted by (priority desc, size desc, group_id) overall and per category, so top-k,
+# threshold and paginated queries read a slice instead of scanning the whole group map, and a group
+# that gains a complaint is re-positioned in O(log n) (a bisect-backed list when sortedcontainers is
+# not installed: O(log n) search plus a memmove).
+
+import bisect
+
+try:
+    from sortedcontainers import SortedList
+except ImportError:  # optional dependency
+    SortedList = None
+
+# Partition key for the unfiltered ordering; a private sentinel, so it never collides with a
+# group whose category is None
+ALL = object()
+
+
+class _BisectList:
+    """The slice of sortedcontainers.SortedList this module uses, on a plain list."""
+    def __init__(self, iterable=()):
+        self._items = sorted(iterable)
+
+    def add(self, item):
+        bisect.insort(self._items, item)
+
+    def remove(self, item):
+        i = bisect.bisect_left(self._items, item)
+        if i == len(self._items) or self._items[i] != item:
+            raise ValueError(item)
+        del self._items[i]
+
+    def bisect_left(self, item):
+        return bisect.bisect_left(self._items, item)
+
+    def __getitem__(self, i):
+        return self._items[i]
+
+    def __len__(self):
+        return len(self._items)
+
+
+def _sorted_list(iterable=()):
+    return SortedList(iterable) if SortedList is not None else _BisectList(iterable)
+
+
+class GroupPriorityIndex:
+    def __init__(self, groups=None):
+        self._partitions = {ALL: _sorted_list()}
+        # group_id -> (sort key, category)
+        self._entries = {}
+        if groups is not None:
+            self.rebuild(groups)
+
+    @staticmethod
+    def _key(group_id, priority, size):
+        return (-priority, -size, group_id)
+
+    def rebuild(self, groups):
+        """Re-indexes a whole group map (group_id -> group dict) in one sort per partition."""
+        self._entries = {
+            group_id: (self._key(group_id, data.get('priority', 0), len(data['complaints'])), data.get('category'))
+            for group_id, data in groups.items()
+        }
+        by_category = {}
+        for key, category in self._entries.values():
+            by_category.setdefault(category, []).append(key)
+        self._partitions = {ALL: _sorted_list(key for key, _ in self._entries.values())}
+        for category, keys in by_category.items():
+            self._partitions[category] = _sorted_list(keys)
+
+    def upsert(self, group_id, group_data):
+        """Adds a group or moves it after its priority, size or category changed."""
+        self.remove(group_id)
+        key = self._key(group_id, group_data.get('priority', 0), len(group_data['complaints']))
+        category = group_data.get('category')
+        self._entries[group_id] = (key, category)
+        self._partitions[ALL].add(key)
+        if category not in self._partitions:
+            self._partitions[category] = _sorted_list()
+        self._partitions[category].add(key)
+
+    def remove(self, group_id):
+        entry = self._entries.pop(group_id, None)
+        if entry is None:
+            return
+        key, category = entry
+        self._partitions[ALL].remove(key)
+        self._partitions[category].remove(key)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def count(self, category=ALL, min_priority=None):
+        """Number of groups in a partition, optionally only those with priority >= min_priority."""
+        partition = self._partitions.get(category)
+        if partition is None:
+            return 0
+        if min_priority is None:
+            return len(partition)
+        # -size is always below +inf, so this lands just after the last group with priority >= min_priority
+        return partition.bisect_left((-min_priority, float('inf')))
+
+    def query(self, category=ALL, min_priority=None, offset=0, limit=10):
+        """
+        One page of groups, worst first: a list of {'group_id', 'priority', 'size', 'category'}.
+        Costs O(log n + limit) regardless of how many groups exist.
+        """
+        partition = self._partitions.get(category)
+        if partition is None:
+            return []
+        end = self.count(category, min_priority)
+        page = partition[max(offset, 0):min(offset + limit, end)] if offset < end else []
+        return [
+            {'group_id': group_id, 'priority': -neg_priority, 'size': -neg_size,
+             'category': self._entries[group_id][1]}
+            for neg_priority, neg_size, group_id in page
+        ]
+
+    def top(self, k=10, category=ALL):
+        return self.query(category, limit=k)
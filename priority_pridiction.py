@@ -1,13 +1,26 @@
 import torch
 from transformers import BertTokenizer, BertForSequenceClassification
-from typing import Dict
+from typing import Dict, List, Optional
 
 class PriorityPredictor:
     """
     A class to load a fine-tuned BERT model and predict complaint priority.
+
+    Args:
+        model_path (str): Path to the fine-tuned state dict.
+        quantize (bool): Use an int8 dynamic-quantized copy of the model (CPU only).
+        num_threads (int): Intra-op thread count for torch on CPU; None keeps torch's default.
+        max_length (int): Token limit per complaint; batches are padded only to their longest sequence.
     """
-    def __init__(self, model_path: str = 'priority_prediction_model.pth'):
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    def __init__(self, model_path: str = 'priority_prediction_model.pth', quantize: bool = False,
+                 num_threads: Optional[int] = None, max_length: int = 64):
+        # Dynamic quantization only has CPU kernels.
+        use_cuda = torch.cuda.is_available() and not quantize
+        self.device = torch.device('cuda' if use_cuda else 'cpu')
+        self.max_length = max_length
+        self.quantized = quantize
+        if num_threads:
+            torch.set_num_threads(num_threads)
         
         print("🚀 Loading BERT tokenizer...")
         self.tokenizer = BertTokenizer.from_pretrained('bert-base-uncased', do_lower_case=True)
@@ -23,6 +36,9 @@ class PriorityPredictor:
         self.model.load_state_dict(torch.load(model_path, map_location=self.device))
         self.model.to(self.device)
         self.model.eval()
+        if quantize:
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+            print("✅ Model quantized to int8 (dynamic).")
         print("✅ Model loaded successfully!")
 
         self.priority_labels = ['low', 'high']
@@ -31,27 +47,36 @@ class PriorityPredictor:
         """
         Predicts the priority of a single complaint.
         """
-        encoded_input = self.tokenizer.encode_plus(
-            complaint_text,
-            add_special_tokens=True,
-            max_length=64,
-            truncation=True,
-            padding='max_length',
-            return_attention_mask=True,
-            return_tensors='pt',
-        )
-        
-        input_ids = encoded_input['input_ids'].to(self.device)
-        attention_mask = encoded_input['attention_mask'].to(self.device)
-        
-        with torch.no_grad():
-            outputs = self.model(input_ids, token_type_ids=None, attention_mask=attention_mask)
-        
-        logits = outputs.logits
-        predicted_class = torch.argmax(logits, dim=1).item()
-        predicted_priority = self.priority_labels[predicted_class]
-        
-        return {
-            "predicted_priority": predicted_priority,
-            "confidence": torch.nn.functional.softmax(logits, dim=1).max().item()
-        }
\ No newline at end of file
+        return self.predict_batch([complaint_text])[0]
+
+    def predict_batch(self, complaint_texts: List[str], batch_size: int = 32) -> List[Dict]:
+        """
+        Predicts the priority of many complaints, padding each batch only to its longest sequence.
+        """
+        results = []
+        for start in range(0, len(complaint_texts), batch_size):
+            batch = complaint_texts[start:start + batch_size]
+            encoded_input = self.tokenizer(
+                batch,
+                add_special_tokens=True,
+                max_length=self.max_length,
+                truncation=True,
+                padding='longest',
+                return_attention_mask=True,
+                return_tensors='pt',
+            )
+
+            input_ids = encoded_input['input_ids'].to(self.device)
+            attention_mask = encoded_input['attention_mask'].to(self.device)
+
+            with torch.inference_mode():
+                outputs = self.model(input_ids, token_type_ids=None, attention_mask=attention_mask)
+
+            probabilities = torch.nn.functional.softmax(outputs.logits, dim=1)
+            confidences, predicted_classes = probabilities.max(dim=1)
+            for predicted_class, confidence in zip(predicted_classes.tolist(), confidences.tolist()):
+                results.append({
+                    "predicted_priority": self.priority_labels[predicted_class],
+                    "confidence": confidence
+                })
+        return results
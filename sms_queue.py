@@ -0,0 +1,216 @@
+# sms_queue.py
+#
+# Non-blocking outbound SMS delivery.
+# Requests enqueue messages and return; a small worker pool drains the queue in batches
+# through a pluggable transport, retrying failures with exponential backoff. Enqueueing is
+# rate limited per phone number, and the queue reports depth and delivery latency.
+
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+
+
+# --- Transports ---
+class TwilioTransport:
+    def __init__(self, account_sid, auth_token, from_number):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            from twilio.rest import Client
+            self._client = Client(self.account_sid, self.auth_token)
+        return self._client
+
+    def send(self, to, body):
+        return self._get_client().messages.create(body=body, from_=self.from_number, to=to).sid
+
+
+class InMemoryTransport:
+    """Keeps sent messages in a list; for tests and local development."""
+    def __init__(self):
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send(self, to, body):
+        message_id = uuid.uuid4().hex
+        with self._lock:
+            self.sent.append({'id': message_id, 'to': to, 'body': body, 'sent_at': time.time()})
+        return message_id
+
+
+class FileTransport:
+    """Appends each message as a JSON line to an outbox file; a local stand-in for a gateway."""
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, to, body):
+        message_id = uuid.uuid4().hex
+        line = json.dumps({'id': message_id, 'to': to, 'body': body, 'sent_at': time.time()})
+        with self._lock, open(self.path, 'a') as f:
+            f.write(line + '\n')
+        return message_id
+
+
+# --- Queue ---
+class OutboundSMSQueue:
+    def __init__(self, transport, workers=2, batch_size=20, max_retries=3, backoff_base=0.5,
+                 rate_limit=3, rate_window_seconds=60):
+        """
+        Args:
+            transport: Object with send(to, body) -> message id.
+            workers (int): Number of delivery threads.
+            batch_size (int): Max messages a worker takes per pass.
+            max_retries (int): Retries after the first failed attempt.
+            backoff_base (float): Seconds before the first retry; doubles per attempt, with jitter.
+            rate_limit (int): Messages allowed per phone within rate_window_seconds.
+        """
+        self.transport = transport
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.rate_limit = rate_limit
+        self.rate_window_seconds = rate_window_seconds
+
+        self._cond = threading.Condition()
+        self._heap = []                     # (due_time, seq, message)
+        self._seq = itertools.count()
+        self._recent = defaultdict(deque)   # phone -> enqueue timestamps inside the window
+        self._last_sweep = time.time()
+        self._latencies = deque(maxlen=1000)
+        self._in_flight = 0
+        self._closed = False
+        self.stats = {'enqueued': 0, 'sent': 0, 'failed': 0, 'retried': 0, 'rate_limited': 0}
+
+        self._workers = [
+            threading.Thread(target=self._run, name=f'sms-worker-{i}', daemon=True) for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def _sweep(self, now):
+        # Drop phones whose window has emptied, so _recent only holds recently active numbers
+        self._last_sweep = now
+        for phone in [phone for phone, window in self._recent.items()
+                      if not window or now - window[-1] > self.rate_window_seconds]:
+            del self._recent[phone]
+
+    def _allow(self, to, now):
+        if now - self._last_sweep > self.rate_window_seconds:
+            self._sweep(now)
+        window = self._recent[to]
+        while window and now - window[0] > self.rate_window_seconds:
+            window.popleft()
+        if len(window) >= self.rate_limit:
+            return False
+        window.append(now)
+        return True
+
+    def reserve(self, to):
+        """
+        Takes one rate-limit slot for the phone ahead of enqueue(..., reserved=True); False if over
+        the limit. Lets callers refuse early, before doing work tied to the message (e.g. storing an OTP).
+        """
+        with self._cond:
+            if self._allow(to, time.time()):
+                return True
+            self.stats['rate_limited'] += 1
+            return False
+
+    def enqueue(self, to, body, reserved=False):
+        """
+        Queues a message and returns its id, or None if the phone is over its rate limit.
+        With reserved=True the slot was already taken by reserve().
+        """
+        now = time.time()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("OutboundSMSQueue is closed")
+            if not reserved and not self._allow(to, now):
+                self.stats['rate_limited'] += 1
+                return None
+            message = {'id': uuid.uuid4().hex, 'to': to, 'body': body, 'attempts': 0, 'enqueued_at': now}
+            heapq.heappush(self._heap, (now, next(self._seq), message))
+            self.stats['enqueued'] += 1
+            self._cond.notify()
+        return message['id']
+
+    def _take_batch(self):
+        with self._cond:
+            while True:
+                if self._closed and not self._heap:
+                    return None
+                now = time.time()
+                if self._heap and self._heap[0][0] <= now:
+                    batch = []
+                    while self._heap and self._heap[0][0] <= now and len(batch) < self.batch_size:
+                        batch.append(heapq.heappop(self._heap)[2])
+                    self._in_flight += len(batch)
+                    return batch
+                timeout = self._heap[0][0] - now if self._heap else None
+                self._cond.wait(timeout)
+
+    def _deliver(self, message):
+        message['attempts'] += 1
+        try:
+            self.transport.send(message['to'], message['body'])
+        except Exception as e:
+            with self._cond:
+                if message['attempts'] <= self.max_retries:
+                    delay = self.backoff_base * (2 ** (message['attempts'] - 1)) * random.uniform(0.8, 1.2)
+                    heapq.heappush(self._heap, (time.time() + delay, next(self._seq), message))
+                    self.stats['retried'] += 1
+                    self._cond.notify()
+                else:
+                    self.stats['failed'] += 1
+                    print(f"⚠️ SMS to {message['to']} failed after {message['attempts']} attempts:", e)
+            return
+        with self._cond:
+            self.stats['sent'] += 1
+            self._latencies.append(time.time() - message['enqueued_at'])
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            try:
+                for message in batch:
+                    self._deliver(message)
+            finally:
+                with self._cond:
+                    self._in_flight -= len(batch)
+                    self._cond.notify_all()
+
+    def depth(self):
+        with self._cond:
+            return len(self._heap) + self._in_flight
+
+    def metrics(self):
+        with self._cond:
+            latencies = sorted(self._latencies)
+            depth = len(self._heap) + self._in_flight
+            stats = dict(self.stats)
+
+        def pct(q):
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 1) if latencies else None
+
+        return {'depth': depth, **stats, 'latency_ms_p50': pct(0.50), 'latency_ms_p99': pct(0.99)}
+
+    def close(self, timeout=None):
+        """
+        Stops accepting messages; workers exit once the queue (including pending retries) is drained.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join(timeout)
@@ -0,0 +1,200 @@
+# spatial_index.py
+#
+# In-memory grid hash over complaint locations for radius ("within 300 m of here") and
+# bounding-box queries. Cells are ~cell_meters squares: equal-angle latitude bands, with each
+# band's longitude step sized at its center latitude (as SpatialPrefilter in ann_index.py does).
+# Each occupied cell holds growable numpy arrays of keys and coordinates, so a query only reads
+# the cells it overlaps and filters them vectorized; cost follows the result size, not the table.
+
+import math
+
+import numpy as np
+
+EARTH_RADIUS_METERS = 6371000.0
+
+
+def haversine_meters(lat, lon, lats, lons):
+    """Great-circle distance from one point to arrays of points."""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class _Cell:
+    __slots__ = ('size', 'keys', 'coords')
+
+    def __init__(self, capacity=8):
+        self.size = 0
+        self.keys = np.empty(capacity, dtype=np.int64)
+        self.coords = np.empty((capacity, 2), dtype=np.float64)
+
+    def extend(self, keys, coords):
+        needed = self.size + len(keys)
+        if needed > len(self.keys):
+            capacity = max(needed, 2 * len(self.keys))
+            self.keys = np.resize(self.keys, capacity)
+            self.coords = np.resize(self.coords, (capacity, 2))
+        self.keys[self.size:needed] = keys
+        self.coords[self.size:needed] = coords
+        self.size = needed
+
+    def remove(self, key):
+        hits = np.flatnonzero(self.keys[:self.size] == key)
+        if not len(hits):
+            return False
+        i, last = hits[0], self.size - 1
+        self.keys[i], self.coords[i] = self.keys[last], self.coords[last]
+        self.size = last
+        return True
+
+
+class GridSpatialIndex:
+    def __init__(self, cell_meters=250):
+        self.cell_meters = cell_meters
+        self._lat_step = cell_meters / 111111
+        self._cells = {}
+        self._count = 0
+        # Highest key ever added, for incremental catch-up from an autoincrement id column
+        self.max_key = None
+
+    def _lon_step(self, band):
+        band_lat = (band + 0.5) * self._lat_step
+        return self.cell_meters / (111111 * max(math.cos(math.radians(band_lat)), 1e-6))
+
+    def _cell(self, lat, lon):
+        band = math.floor(lat / self._lat_step)
+        return band, math.floor(lon / self._lon_step(band))
+
+    def __len__(self):
+        return self._count
+
+    def clear(self):
+        self._cells = {}
+        self._count = 0
+        self.max_key = None
+
+    def add(self, key, lat, lon):
+        cell_id = self._cell(lat, lon)
+        cell = self._cells.get(cell_id)
+        if cell is None:
+            cell = self._cells[cell_id] = _Cell()
+        cell.extend([key], [(lat, lon)])
+        self._count += 1
+        self.max_key = key if self.max_key is None else max(self.max_key, key)
+
+    def add_batch(self, keys, lats, lons):
+        """
+        Bulk insert, e.g. the whole Complaint table at startup: cells are computed vectorized and
+        each occupied cell is extended once. Rows with a missing (NaN) coordinate are skipped.
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        coords = np.column_stack((np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)))
+        valid = ~np.isnan(coords).any(axis=1)
+        keys, coords = keys[valid], coords[valid]
+        if not len(keys):
+            return 0
+
+        bands = np.floor(coords[:, 0] / self._lat_step)
+        band_lats = (bands + 0.5) * self._lat_step
+        lon_steps = self.cell_meters / (111111 * np.maximum(np.cos(np.radians(band_lats)), 1e-6))
+        lon_cells = np.floor(coords[:, 1] / lon_steps)
+        cells, inverse = np.unique(np.column_stack((bands, lon_cells)).astype(np.int64), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.cumsum(np.bincount(inverse, minlength=len(cells)))
+        start = 0
+        for (band, lon_cell), end in zip(cells.tolist(), bounds.tolist()):
+            rows = order[start:end]
+            cell = self._cells.get((band, lon_cell))
+            if cell is None:
+                cell = self._cells[(band, lon_cell)] = _Cell(capacity=max(8, len(rows)))
+            cell.extend(keys[rows], coords[rows])
+            start = end
+        self._count += len(keys)
+        top = int(keys.max())
+        self.max_key = top if self.max_key is None else max(self.max_key, top)
+        return len(keys)
+
+    def remove(self, key, lat, lon):
+        cell_id = self._cell(lat, lon)
+        cell = self._cells.get(cell_id)
+        if cell is None or not cell.remove(key):
+            return False
+        if cell.size == 0:
+            del self._cells[cell_id]
+        self._count -= 1
+        return True
+
+    def _cells_in(self, min_lat, min_lon, max_lat, max_lon):
+        """Yields occupied cells overlapping a lat/lon box, probing by range or by occupancy, whichever is smaller."""
+        if not all(math.isfinite(v) for v in (min_lat, min_lon, max_lat, max_lon)):
+            raise ValueError("coordinates must be finite")
+        band_lo, band_hi = math.floor(min_lat / self._lat_step), math.floor(max_lat / self._lat_step)
+        ranges = {}
+        total = 0
+        for band in range(band_lo, band_hi + 1):
+            step = self._lon_step(band)
+            ranges[band] = (math.floor(min_lon / step), math.floor(max_lon / step))
+            total += ranges[band][1] - ranges[band][0] + 1
+            if total > len(self._cells):
+                break
+        if total <= len(self._cells):
+            for band, (lo, hi) in ranges.items():
+                for lon_cell in range(lo, hi + 1):
+                    cell = self._cells.get((band, lon_cell))
+                    if cell is not None:
+                        yield cell
+            return
+        for (band, lon_cell), cell in self._cells.items():
+            if band_lo <= band <= band_hi:
+                step = self._lon_step(band)
+                if math.floor(min_lon / step) <= lon_cell <= math.floor(max_lon / step):
+                    yield cell
+
+    def near(self, lat, lon, radius_meters, limit=None):
+        """
+        Keys within radius_meters of (lat, lon), nearest first, as (key, distance_meters) pairs.
+        """
+        d_lat = radius_meters / 111111
+        # Widest longitude span of the radius across the latitudes it covers
+        edge_lat = min(abs(lat) + d_lat, 89.9)
+        d_lon = radius_meters / (111111 * math.cos(math.radians(edge_lat)))
+
+        found_keys, found_dist = [], []
+        for cell in self._cells_in(lat - d_lat, lon - d_lon, lat + d_lat, lon + d_lon):
+            coords = cell.coords[:cell.size]
+            distances = haversine_meters(lat, lon, coords[:, 0], coords[:, 1])
+            inside = distances <= radius_meters
+            if inside.any():
+                found_keys.append(cell.keys[:cell.size][inside])
+                found_dist.append(distances[inside])
+        if not found_keys:
+            return []
+        keys, distances = np.concatenate(found_keys), np.concatenate(found_dist)
+        if limit is not None and limit < len(keys):
+            top = np.argpartition(distances, limit - 1)[:limit]
+            keys, distances = keys[top], distances[top]
+        order = np.argsort(distances, kind='stable')
+        return list(zip(keys[order].tolist(), distances[order].tolist()))
+
+    def within(self, min_lat, min_lon, max_lat, max_lon, limit=None):
+        """
+        Keys inside a lat/lon box; stops reading cells once `limit` keys are found.
+        """
+        found = []
+        count = 0
+        for cell in self._cells_in(min_lat, min_lon, max_lat, max_lon):
+            coords = cell.coords[:cell.size]
+            inside = ((coords[:, 0] >= min_lat) & (coords[:, 0] <= max_lat) &
+                      (coords[:, 1] >= min_lon) & (coords[:, 1] <= max_lon))
+            keys = cell.keys[:cell.size][inside]
+            if len(keys):
+                found.append(keys)
+                count += len(keys)
+                if limit is not None and count >= limit:
+                    break
+        if not found:
+            return []
+        keys = np.concatenate(found)
+        return keys[:limit].tolist() if limit is not None else keys.tolist()
@@ -0,0 +1,39 @@
+import pytest
+
+import ai_module
+from ai_module import analyze_complaint, classify_batch, classify_complaint
+
+
+@pytest.mark.parametrize("text, category", [
+    # The module's own example: water, pipeline and leaking outnumber pothole and street
+    ("There is a huge pothole on the street and the water pipeline nearby is leaking.", "water"),
+    ("The pipe is leaking since morning", "water"),
+    ("Drainage blocked and sewage overflowing", "water"),
+    ("Waterlogging near the school", "water"),
+    ("Streetlights are not working", "road"),
+    ("Frequent power cuts and voltage fluctuations", "electricity"),
+    ("Overflowing dustbins causing foul smell", "garbage"),
+    ("Garbage dumped on the roadside", "garbage"),
+    # Keywords inside other words do not count
+    ("My flight was delayed", "other"),
+    ("Loud construction work disturbing at night", "other"),
+    ("", "other"),
+])
+def test_classify_complaint(text, category):
+    assert classify_complaint(text) == category
+
+
+def test_batch_matches_single():
+    texts = ["Pipes leaking", "Bins overflowing", "Nothing to see"]
+    assert classify_batch(texts) == [classify_complaint(t) for t in texts] == ["water", "garbage", "other"]
+
+
+def test_set_categories_swaps_the_table(monkeypatch):
+    monkeypatch.setattr(ai_module, "_matcher", ai_module._matcher)
+    monkeypatch.setattr(ai_module, "CATEGORIES", ai_module.CATEGORIES)
+    monkeypatch.setattr(ai_module, "RECOMMENDED_SCHEMES", ai_module.RECOMMENDED_SCHEMES)
+
+    ai_module.set_categories({"noise": ["loud", "horn"], "other": []}, {"noise": "Quiet Zones"})
+
+    assert analyze_complaint("Horns honking all night") == {"category": "noise", "recommended_scheme": "Quiet Zones"}
+    assert classify_complaint("Water leaking") == "other"
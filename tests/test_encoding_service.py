@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from encoding_service import BatchingEncoder
+
+
+class RecordingModel:
+    """Encodes a text as [len(text), scale]; records every call's texts and keyword arguments."""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, scale=1.0, **kwargs):
+        self.calls.append((list(texts), dict(kwargs, scale=scale)))
+        return np.array([[len(text), scale] for text in texts])
+
+
+@pytest.fixture
+def model():
+    return RecordingModel()
+
+
+@pytest.fixture
+def encoder(model):
+    encoder = BatchingEncoder(model, max_wait_ms=50)
+    yield encoder
+    encoder.close(timeout=5)
+
+
+def test_keyword_arguments_reach_the_model(model, encoder):
+    assert encoder.encode(["ab", "abc"], scale=2.0).tolist() == [[2, 2], [3, 2]]
+    assert encoder.encode("abcd", scale=3.0).tolist() == [4, 3]
+    assert all(call_kwargs == {'scale': scale} for (_, call_kwargs), scale in zip(model.calls, (2.0, 3.0)))
+
+
+def test_requests_are_only_batched_with_equal_keyword_arguments(model, encoder):
+    plain = [encoder.submit("a"), encoder.submit("bb")]
+    scaled = [encoder.submit("ccc", scale=5.0), encoder.submit("a", scale=5.0)]
+
+    assert [f.result(5).tolist() for f in plain] == [[1, 1], [2, 1]]
+    assert [f.result(5).tolist() for f in scaled] == [[3, 5], [1, 5]]
+    assert sorted(model.calls) == [(["a", "bb"], {'scale': 1.0}), (["ccc", "a"], {'scale': 5.0})]
@@ -0,0 +1,61 @@
+import pytest
+
+import priority_index
+from priority_index import ALL, GroupPriorityIndex
+
+
+def group(priority, category=None):
+    return {'priority': priority, 'complaints': [None] * priority, 'category': category}
+
+
+@pytest.fixture(params=['sortedcontainers', 'bisect'])
+def index_cls(request, monkeypatch):
+    if request.param == 'bisect':
+        monkeypatch.setattr(priority_index, 'SortedList', None)
+    elif priority_index.SortedList is None:
+        pytest.skip("sortedcontainers not installed")
+    return GroupPriorityIndex
+
+
+def ids(page):
+    return [entry['group_id'] for entry in page]
+
+
+def test_uncategorized_group_does_not_replace_the_unfiltered_partition(index_cls):
+    index = index_cls({'a': group(3), 'b': group(5, 'Water'), 'c': group(1, 'Road')})
+
+    assert ids(index.query(ALL)) == ['b', 'a', 'c']
+    assert ids(index.query(None)) == ['a']
+    assert index.count(ALL) == 3
+
+
+def test_upsert_and_remove_uncategorized_after_rebuild(index_cls):
+    index = index_cls({'a': group(3), 'b': group(5, 'Water')})
+
+    index.upsert('a', group(7))
+    assert ids(index.query(ALL)) == ['a', 'b']
+    assert ids(index.query(None)) == ['a']
+
+    index.remove('a')
+    assert ids(index.query(ALL)) == ['b']
+    assert index.count(None) == 0
+    assert len(index) == 1
+
+
+def test_upsert_into_empty_index_adds_each_group_once(index_cls):
+    index = index_cls()
+    index.upsert('a', group(2))
+    index.upsert('a', group(4))
+    index.upsert('b', group(3, 'Water'))
+
+    assert ids(index.query(ALL)) == ['a', 'b']
+    assert index.count(ALL) == 2
+
+
+def test_threshold_and_paging(index_cls):
+    index = index_cls({f'g{i}': group(i, 'Water' if i % 2 else None) for i in range(1, 9)})
+
+    assert index.count(ALL, min_priority=5) == 4
+    assert ids(index.query(ALL, min_priority=5, offset=1, limit=2)) == ['g7', 'g6']
+    assert ids(index.query('Water', min_priority=4)) == ['g7', 'g5']
+    assert ids(index.top(2, None)) == ['g8', 'g6']
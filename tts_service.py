@@ -0,0 +1,174 @@
+# tts_service.py
+#
+# Asynchronous, cached text-to-speech for /speak.
+# A single worker thread owns one reused pyttsx3 engine and renders queued jobs.
+# Audio is cached on disk by a hash of the normalized message (tts_<hash>.wav), so a
+# repeated announcement is served without rendering; the cache folder is kept under a
+# size/file-count budget with least-recently-used eviction.
+
+import hashlib
+import os
+import queue
+import re
+import threading
+import uuid
+from collections import OrderedDict
+
+CACHE_PREFIX = "tts_"
+CACHE_SUFFIX = ".wav"
+
+
+def normalize_message(message):
+    return re.sub(r"\s+", " ", message).strip().lower()
+
+
+def message_key(message):
+    return hashlib.sha256(normalize_message(message).encode("utf-8")).hexdigest()[:32]
+
+
+def _default_engine_factory():
+    import pyttsx3
+    return pyttsx3.init()
+
+
+class TTSService:
+    def __init__(self, audio_folder, max_cache_bytes=200 * 1024 * 1024, max_cache_files=2000,
+                 max_jobs=10000, engine_factory=None):
+        self.audio_folder = audio_folder
+        self.max_cache_bytes = max_cache_bytes
+        self.max_cache_files = max_cache_files
+        self.max_jobs = max_jobs
+        self.engine_factory = engine_factory or _default_engine_factory
+        self.stats = {'hits': 0, 'misses': 0, 'rendered': 0, 'failed': 0, 'evicted': 0}
+
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()      # job_id -> job dict
+        self._inflight = {}             # cache key -> job_id
+        self._cache = OrderedDict()     # filename -> size, least recently used first
+        self._cache_bytes = 0
+        self._queue = queue.Queue()
+        self._load_cache_index()
+        self._worker = threading.Thread(target=self._run, name="tts-worker", daemon=True)
+        self._worker.start()
+
+    def _load_cache_index(self):
+        entries = []
+        for name in os.listdir(self.audio_folder):
+            if name.startswith(CACHE_PREFIX) and name.endswith(CACHE_SUFFIX):
+                st = os.stat(os.path.join(self.audio_folder, name))
+                entries.append((st.st_mtime, name, st.st_size))
+        for _, name, size in sorted(entries):
+            self._cache[name] = size
+            self._cache_bytes += size
+
+    @staticmethod
+    def filename_for(message):
+        return f"{CACHE_PREFIX}{message_key(message)}{CACHE_SUFFIX}"
+
+    def _new_job(self, message, filename, status):
+        job = {
+            'id': uuid.uuid4().hex,
+            'status': status,
+            'file': filename,
+            'error': None,
+            'message': message,
+            'done': threading.Event()
+        }
+        if status == 'done':
+            job['done'].set()
+        self._jobs[job['id']] = job
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+        return job
+
+    def submit(self, message):
+        """
+        Returns a job for the message; it is already 'done' on a cache hit.
+        Identical messages submitted while one is rendering share the same job.
+        """
+        filename = self.filename_for(message)
+        key = filename
+        with self._lock:
+            if filename in self._cache and os.path.exists(os.path.join(self.audio_folder, filename)):
+                self._cache.move_to_end(filename)
+                self.stats['hits'] += 1
+                return self._public(self._new_job(message, filename, 'done'))
+
+            job_id = self._inflight.get(key)
+            if job_id in self._jobs:
+                return self._public(self._jobs[job_id])
+
+            self.stats['misses'] += 1
+            job = self._new_job(message, filename, 'queued')
+            self._inflight[key] = job['id']
+        self._queue.put(job['id'])
+        return self._public(job)
+
+    def get(self, job_id, wait=0):
+        """
+        Returns the job status, optionally blocking up to `wait` seconds for it to finish.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if wait:
+            job['done'].wait(wait)
+        return self._public(job)
+
+    @staticmethod
+    def _public(job):
+        return {'job_id': job['id'], 'status': job['status'], 'file': job['file'], 'error': job['error']}
+
+    def _evict(self):
+        while self._cache and (self._cache_bytes > self.max_cache_bytes or len(self._cache) > self.max_cache_files):
+            name, size = self._cache.popitem(last=False)
+            self._cache_bytes -= size
+            self.stats['evicted'] += 1
+            try:
+                os.remove(os.path.join(self.audio_folder, name))
+            except FileNotFoundError:
+                pass
+
+    def _render(self, engine, job):
+        final_path = os.path.join(self.audio_folder, job['file'])
+        tmp_path = os.path.join(self.audio_folder, f".{job['id']}.tmp{CACHE_SUFFIX}")
+        try:
+            engine.save_to_file(job['message'], tmp_path)
+            engine.runAndWait()
+            os.replace(tmp_path, final_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return os.path.getsize(final_path)
+
+    def _run(self):
+        engine = None
+        while True:
+            job_id = self._queue.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+            if job is None:
+                continue
+            job['status'] = 'running'
+            try:
+                if engine is None:
+                    engine = self.engine_factory()
+                size = self._render(engine, job)
+                with self._lock:
+                    # A re-render replaces the entry, so its old size leaves the byte budget
+                    self._cache_bytes += size - self._cache.pop(job['file'], 0)
+                    self._cache[job['file']] = size
+                    self.stats['rendered'] += 1
+                    self._evict()
+                job['status'] = 'done'
+            except Exception as e:
+                print("⚠️ Text-to-speech failed:", e)
+                job['status'] = 'failed'
+                job['error'] = str(e)
+                self.stats['failed'] += 1
+                engine = None  # re-create the engine after a failure
+            finally:
+                with self._lock:
+                    self._inflight.pop(job['file'], None)
+                job['done'].set()